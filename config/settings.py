@@ -3,6 +3,7 @@ Configurações do sistema AnalisFin
 """
 
 from dataclasses import dataclass
+from datetime import datetime
 from typing import Optional
 from rich.console import Console
 from rich.table import Table
@@ -19,9 +20,25 @@ class Config:
     qtd_consultas: int = 3
     qtd_periodo: int = 5
     
+    # Janelas de tempo
+    align_periods: bool = False      # Encaixa janelas nos limites do intervalo
+    timezone: Optional[str] = None   # Ex: "UTC"; None usa o horário local
+    as_of: Optional[datetime] = None # Fim fixo da análise (execuções reprodutíveis)
+    
     # API
     api_provider: str = "binance"
     api_key: Optional[str] = None
+    api_base_url: Optional[str] = None       # Ex: stub local com respostas gravadas
+    api_min_interval: Optional[float] = None # Segundos entre requisições (None = padrão do provedor)
+    fallback_mock: bool = False              # Dados simulados quando a Binance falha (só testes)
+    
+    # Agregação de negócios (aggTrades)
+    bar_type: str = "time"                   # time, tick ou volume
+    bar_size: str = "1min"                   # Duração, negócios ou volume por barra
+    
+    # Checkpoints de coleta
+    checkpoint_size: int = 1000              # Consultas por bloco salvo em disco
+    runs_dir: str = "data/runs"
     
     # Caminhos
     data_dir: str = "data/csvs"
@@ -42,6 +59,9 @@ class Config:
         table.add_row("Período", self.period)
         table.add_row("Consultas/Período", str(self.qtd_consultas))
         table.add_row("Quantidade de Períodos", str(self.qtd_periodo))
+        table.add_row("Alinhar Períodos", "sim" if self.align_periods else "não")
+        table.add_row("Fuso Horário", self.timezone or "local")
+        table.add_row("Referência", self.as_of.isoformat() if self.as_of else "agora")
         table.add_row("API Provider", self.api_provider)
         
         console.print(table)
\ No newline at end of file
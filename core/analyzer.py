@@ -5,7 +5,8 @@ Implementa diversos indicadores técnicos
 
 import pandas as pd
 import numpy as np
-from typing import Dict
+from typing import Dict, Optional
+from core.market_buffer import MarketDataBuffer
 
 class Analyzer:
     """Analisa tendências de mercado"""
@@ -19,19 +20,70 @@ class Analyzer:
         """
         self.config = config
     
-    def analyze(self, csv_path: str) -> Dict:
+    def analyze(self, csv_path: str, market_data: Optional[MarketDataBuffer] = None,
+                cross_asset: Optional[Dict[str, Dict]] = None) -> Dict:
         """
         Analisa dados do CSV e retorna métricas
         
         Args:
             csv_path: Caminho do arquivo CSV
+            market_data: Buffer já em memória (evita reler o CSV)
+            cross_asset: Métricas entre ativos por símbolo (ver
+                core.cross_asset.cross_asset_analysis)
             
         Returns:
             Dicionário com análise completa
         """
+        results = self.analyze_symbols(csv_path, market_data, cross_asset)
+        
+        if len(results) > 1:
+            raise ValueError(f"Dados com {len(results)} símbolos; use analyze_symbols")
+        
+        return next(iter(results.values()))
+    
+    def analyze_symbols(self, csv_path: str, market_data: Optional[MarketDataBuffer] = None,
+                        cross_asset: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
+        """
+        Analisa cada símbolo separadamente
+        
+        Args:
+            csv_path: Caminho do arquivo CSV
+            market_data: Buffer já em memória (evita reler o CSV)
+            cross_asset: Métricas entre ativos por símbolo (ver
+                core.cross_asset.cross_asset_analysis)
+            
+        Returns:
+            Dicionário símbolo -> análise, cada uma com suas métricas
+            entre ativos
+        """
         # Carrega dados
-        df = pd.read_csv(csv_path)
+        if market_data is not None:
+            df = market_data.to_frame()
+        else:
+            df = pd.read_csv(csv_path)
+        
+        if df['symbol'].nunique() <= 1:
+            symbol = str(df['symbol'].iloc[0]) if len(df) else self.config.symbol
+            groups = [(symbol, df)]
+        else:
+            groups = ((str(symbol), group.copy())
+                      for symbol, group in df.groupby('symbol', sort=False, observed=True))
+        
+        results = {}
         
+        for symbol, group in groups:
+            result = self._analyze_frame(group, csv_path)
+            
+            # Contexto relativo: correlação/beta contra o benchmark e dispersão
+            if cross_asset:
+                result.update(cross_asset.get(symbol, {}))
+            
+            results[symbol] = result
+        
+        return results
+    
+    def _analyze_frame(self, df: pd.DataFrame, csv_path: str) -> Dict:
+        """Tendência e probabilidades de um único símbolo"""
         # Cálculos básicos
         trend_score = self._calculate_trend(df)
         prob_alta, prob_baixa = self._calculate_probabilities(df, trend_score)
@@ -0,0 +1,199 @@
+"""
+Collection Run - Coleta em blocos com checkpoints em disco
+Permite retomar coletas interrompidas pelo ID, refazendo só o que falta
+"""
+
+import json
+import os
+from dataclasses import asdict, fields, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+import requests
+from core.data_fetcher import DataFetcher, FetchError
+from core.market_buffer import MarketDataBuffer
+from core.period_manager import PeriodManager
+from core.query_scheduler import QueryScheduler
+
+# Campos da configuração que não são gravados no manifesto
+_PRIVATE_FIELDS = {'api_key', 'runs_dir', 'data_dir'}
+
+class CollectionRun:
+    """Executa uma coleta em blocos, salvando o progresso a cada bloco"""
+    
+    def __init__(self, config, run_id: Optional[str] = None):
+        """
+        Inicia uma nova coleta
+        
+        O instante de referência (as_of) é congelado no início, para que
+        uma retomada gere exatamente as mesmas consultas. Dados simulados
+        ficam desligados: uma falha da API marca o bloco para retomada em
+        vez de gravá-lo como concluído.
+        
+        Args:
+            config: Objeto de configuração
+            run_id: ID da coleta (padrão: data/hora atual)
+        """
+        tz = ZoneInfo(config.timezone) if config.timezone else None
+        self.config = replace(config, as_of=config.as_of or datetime.now(tz), fallback_mock=False)
+        self.run_id = run_id or datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        self.run_dir = Path(config.runs_dir) / self.run_id
+        self.manifest = {
+            'run_id': self.run_id,
+            'config': self._snapshot(self.config),
+            'total_queries': None,
+            'completed': {},
+            'failed': {},
+            'status': 'em_andamento'
+        }
+    
+    @classmethod
+    def resume(cls, run_id: str, config) -> 'CollectionRun':
+        """
+        Reabre uma coleta existente
+        
+        Args:
+            run_id: ID da coleta
+            config: Configuração atual (fornece api_key e diretórios)
+        
+        Returns:
+            CollectionRun com a configuração gravada no manifesto
+        """
+        manifest_path = Path(config.runs_dir) / run_id / 'manifest.json'
+        
+        if not manifest_path.exists():
+            raise ValueError(f"Coleta não encontrada: {run_id}")
+        
+        manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+        saved = dict(manifest['config'])
+        
+        if saved.get('as_of'):
+            saved['as_of'] = datetime.fromisoformat(saved['as_of'])
+        
+        run = cls(replace(config, **saved), run_id=run_id)
+        run.manifest = manifest
+        
+        return run
+    
+    @staticmethod
+    def _snapshot(config) -> Dict:
+        """Configuração serializável, sem campos privados"""
+        names = {f.name for f in fields(config)} - _PRIVATE_FIELDS
+        snapshot = {name: value for name, value in asdict(config).items() if name in names}
+        snapshot['as_of'] = config.as_of.isoformat()
+        
+        return snapshot
+    
+    def _save_manifest(self):
+        """Grava o manifesto de forma atômica"""
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        path = self.run_dir / 'manifest.json'
+        tmp_path = self.run_dir / 'manifest.json.tmp'
+        tmp_path.write_text(json.dumps(self.manifest, indent=2, ensure_ascii=False),
+                            encoding='utf-8')
+        os.replace(tmp_path, path)
+    
+    def _chunk_path(self, chunk_idx: int) -> Path:
+        """Arquivo de dados de um bloco"""
+        return self.run_dir / f"chunk_{chunk_idx:06d}.npz"
+    
+    def chunks(self, total: int) -> List[Tuple[int, int]]:
+        """
+        Divide as consultas em blocos
+        
+        Args:
+            total: Quantidade de consultas
+        
+        Returns:
+            Lista de faixas (início, fim) de índices de consulta
+        """
+        size = max(1, self.config.checkpoint_size)
+        return [(start, min(start + size, total)) for start in range(0, total, size)]
+    
+    def queries(self) -> List[Dict]:
+        """Regenera as consultas da coleta a partir da configuração congelada"""
+        periods = PeriodManager(self.config).generate_periods()
+        return QueryScheduler(self.config).schedule_queries(periods)
+    
+    @property
+    def pending(self) -> int:
+        """Blocos ainda não concluídos (inclui os que falharam)"""
+        total = self.manifest['total_queries']
+        if total is None:
+            return 0
+        
+        return len(self.chunks(total)) - len(self.manifest['completed'])
+    
+    def run(self, queries: Optional[List[Dict]] = None) -> MarketDataBuffer:
+        """
+        Coleta os blocos pendentes e monta o resultado
+        
+        Blocos concluídos são pulados; blocos que falharam em execuções
+        anteriores são refeitos. Cada bloco é salvo assim que termina.
+        
+        Args:
+            queries: Consultas já geradas (padrão: regenera pela configuração)
+        
+        Returns:
+            Buffer com todos os dados, na ordem das consultas
+        """
+        if queries is None:
+            queries = self.queries()
+        
+        total = self.manifest['total_queries']
+        if total is None:
+            self.manifest['total_queries'] = total = len(queries)
+        elif total != len(queries):
+            raise ValueError(f"Coleta {self.run_id} tem {total} consultas, "
+                             f"mas foram geradas {len(queries)}")
+        
+        completed, failed = self.manifest['completed'], self.manifest['failed']
+        
+        # Um único fetcher: blocos seguintes reaproveitam as barras já baixadas
+        # (e todos usam a granularidade escolhida pela coleta inteira)
+        fetcher = DataFetcher(self.config)
+        resolution = fetcher.resolution(queries)
+        self._save_manifest()
+        
+        for chunk_idx, (start, end) in enumerate(self.chunks(total)):
+            key = str(chunk_idx)
+            
+            if key in completed and self._chunk_path(chunk_idx).exists():
+                continue
+            
+            try:
+                buffer = fetcher.fetch_all(queries[start:end], resolution)
+            except (FetchError, requests.RequestException) as e:
+                failed[key] = {'range': [start, end], 'error': str(e)}
+                self._save_manifest()
+                continue
+            
+            # Grava em arquivo temporário e renomeia: um bloco nunca fica pela metade
+            tmp_path = self.run_dir / f"chunk_{chunk_idx:06d}.tmp.npz"
+            buffer.save(tmp_path)
+            os.replace(tmp_path, self._chunk_path(chunk_idx))
+            
+            completed[key] = [start, end]
+            failed.pop(key, None)
+            self._save_manifest()
+        
+        if failed:
+            self.manifest['status'] = 'incompleta'
+            self._save_manifest()
+            raise RuntimeError(f"{len(failed)} bloco(s) falharam; "
+                               f"retome a coleta com o ID {self.run_id}")
+        
+        self.manifest['status'] = 'concluida'
+        self._save_manifest()
+        
+        return self.load_data()
+    
+    def load_data(self) -> MarketDataBuffer:
+        """Junta os blocos salvos em um único buffer"""
+        buffer = MarketDataBuffer(capacity=self.manifest['total_queries'] or 1)
+        
+        for chunk_idx in sorted(int(key) for key in self.manifest['completed']):
+            buffer.extend(MarketDataBuffer.load(self._chunk_path(chunk_idx)))
+        
+        return buffer
\ No newline at end of file
@@ -0,0 +1,365 @@
+"""
+Cross Asset - Correlação e beta móveis entre vários ativos
+Processa as séries em blocos de tempo, com memória limitada
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.market_buffer import MarketDataBuffer
+
+# Variância abaixo disto é tratada como série constante (correlação indefinida)
+_MIN_VARIANCE = 1e-18
+
+def _symbol_columns(market_data: MarketDataBuffer,
+                    symbols: List[str]) -> np.ndarray:
+    """Código do buffer -> coluna no bloco (-1 = símbolo ignorado)"""
+    columns = np.full(len(market_data.symbols), -1, dtype=np.int64)
+    
+    for col, symbol in enumerate(symbols):
+        if symbol not in market_data.symbols:
+            raise ValueError(f"Símbolo sem dados: {symbol}")
+        columns[market_data.symbols.index(symbol)] = col
+    
+    return columns
+
+
+def _time_runs(ts: np.ndarray, chunk: int = 1 << 20) -> np.ndarray:
+    """
+    Limites dos trechos do buffer já em ordem de tempo
+    
+    Um buffer montado símbolo a símbolo tem um trecho por símbolo; um
+    buffer intercalado por instante tem um só. A varredura é feita em
+    pedaços para não criar temporários do tamanho do buffer.
+    """
+    last = len(ts) - 1
+    breaks = [np.flatnonzero(ts[start + 1:min(start + chunk, last) + 1]
+                             < ts[start:min(start + chunk, last)]) + start + 1
+              for start in range(0, max(last, 0), chunk)]
+    
+    return np.concatenate([[0], *breaks, [len(ts)]]).astype(np.int64)
+
+
+def iter_aligned_closes(market_data: MarketDataBuffer, symbols: Optional[List[str]] = None,
+                        block_size: int = 1024) -> Iterator[Tuple[pd.DatetimeIndex, np.ndarray]]:
+    """
+    Alinha os fechamentos de vários símbolos numa grade de tempo comum, em blocos
+    
+    A grade é a união dos timestamps dos símbolos escolhidos. O buffer é
+    percorrido como uma intercalação dos seus trechos em ordem de tempo
+    (normalmente um por símbolo), e cada bloco cobre no máximo
+    `block_size` instantes. Símbolos sem barra num instante ficam com NaN;
+    a CrossAssetEngine repete o último fechamento conhecido. Só um bloco
+    B×N existe por vez, então a memória não cresce com a série. Um buffer
+    sem ordem de tempo aproveitável recebe uma permutação de ordenação
+    (8 bytes por linha).
+    
+    Args:
+        market_data: Buffer com linhas de vários símbolos
+        symbols: Símbolos a usar, nessa ordem (padrão: todos do buffer)
+        block_size: Instantes por bloco
+    
+    Yields:
+        Tuplas (timestamps, fechamentos B×N)
+    """
+    symbols = list(symbols or market_data.symbols)
+    columns = _symbol_columns(market_data, symbols)
+    ts = market_data.column('timestamp')
+    codes = market_data.column('symbol')
+    close = market_data.column('close')
+    n = len(symbols)
+    
+    bounds = _time_runs(ts)
+    order = None
+    
+    # Buffer sem ordem aproveitável (muitos trechos): ordena uma permutação
+    if len(bounds) - 1 > 8 * max(len(market_data.symbols), 1):
+        order = np.argsort(ts, kind='stable')
+        bounds = np.array([0, len(ts)], dtype=np.int64)
+    
+    cursors, ends = bounds[:-1].copy(), bounds[1:]
+    
+    # Linhas vistas por trecho a cada bloco: um trecho intercalado traz
+    # vários símbolos por instante
+    width = block_size * max(1, len(market_data.symbols) // max(len(cursors), 1))
+    
+    def rows(lo: int, hi: int):
+        return slice(lo, hi) if order is None else order[lo:hi]
+    
+    def count_below(run: int, stamps: np.ndarray, bound: int) -> int:
+        """Linhas do trecho antes de `bound`, olhando além da janela se preciso"""
+        count = int(np.searchsorted(stamps, bound, 'left'))
+        seen = len(stamps)
+        
+        while count == seen and cursors[run] + seen < ends[run]:
+            more = ts[rows(cursors[run] + seen, min(cursors[run] + 2 * seen, ends[run]))]
+            count += int(np.searchsorted(more, bound, 'left'))
+            seen += len(more)
+        
+        return count
+    
+    while True:
+        active = np.flatnonzero(cursors < ends)
+        if not len(active):
+            return
+        
+        # Limite do bloco: nenhum trecho pode passar da sua janela de linhas
+        bound = np.iinfo(np.int64).max
+        windows = {}
+        
+        for run in active:
+            lo, hi = cursors[run], min(cursors[run] + width, ends[run])
+            windows[run] = ts[rows(lo, hi)]
+            if hi < ends[run]:
+                bound = min(bound, int(ts[rows(hi, hi + 1)][0]))
+        
+        candidates = np.unique(np.concatenate([stamps[stamps < bound]
+                                               for stamps in windows.values()]))
+        
+        if len(candidates) > block_size:
+            bound = int(candidates[block_size])
+        elif not len(candidates):
+            # Mais de `width` linhas no mesmo instante: o bloco é esse instante
+            bound = min(int(stamps[0]) for stamps in windows.values()) + 1
+        
+        taken = []
+        
+        # Um instante nunca é dividido entre blocos
+        for run, stamps in windows.items():
+            count = count_below(run, stamps, bound)
+            if count:
+                taken.append(rows(cursors[run], cursors[run] + count))
+                cursors[run] += count
+        
+        if order is None:
+            taken = np.concatenate([np.arange(r.start, r.stop) for r in taken])
+        else:
+            taken = np.concatenate(taken)
+        
+        taken = taken[columns[codes[taken]] >= 0]
+        if not len(taken):
+            continue
+        
+        taken = taken[np.argsort(ts[taken], kind='stable')]
+        stamps = ts[taken]
+        
+        first = np.ones(len(stamps), dtype=bool)
+        first[1:] = stamps[1:] != stamps[:-1]
+        positions = np.cumsum(first) - 1
+        
+        grid = stamps[first]
+        closes = np.full((len(grid), n), np.nan)
+        closes[positions, columns[codes[taken]]] = close[taken]
+        
+        index = pd.DatetimeIndex(grid.view('datetime64[ns]'))
+        if market_data.tz is not None:
+            index = index.tz_localize('UTC').tz_convert(market_data.tz)
+        
+        yield index, closes
+
+
+class CrossAssetEngine:
+    """Correlação, beta e dispersão móveis com atualização incremental"""
+    
+    def __init__(self, symbols: List[str], benchmark: str, window: int = 100,
+                 track_matrix: bool = True):
+        """
+        Inicializa engine
+        
+        Args:
+            symbols: Símbolos, na ordem das colunas dos blocos
+            benchmark: Símbolo de referência para correlação e beta
+            window: Tamanho da janela móvel (em barras)
+            track_matrix: Mantém a matriz de correlação da janela atual
+        """
+        if benchmark not in symbols:
+            raise ValueError(f"Benchmark {benchmark} não está entre os símbolos")
+        if window < 2:
+            raise ValueError("Janela deve ter ao menos 2 barras")
+        
+        n = len(symbols)
+        self.symbols = list(symbols)
+        self.benchmark = benchmark
+        self.window = window
+        self.track_matrix = track_matrix
+        self._bench = self.symbols.index(benchmark)
+        
+        # Estado: últimas `window` barras de retornos e somas da janela
+        self._last_close = np.full(n, np.nan)
+        self._tail = np.zeros((window, n))
+        self._tail_valid = np.zeros((window, n), dtype=bool)
+        self._xtx = np.zeros((n, n))
+        self._sum = np.zeros(n)
+        
+        self.latest = {'correlation': np.full(n, np.nan), 'beta': np.full(n, np.nan),
+                       'dispersion': np.nan}
+    
+    def _window_sums(self, values: np.ndarray, rows: int) -> np.ndarray:
+        """Somas das janelas que terminam nas últimas `rows` linhas, via soma acumulada"""
+        cumsum = np.cumsum(values, axis=0)
+        ends = cumsum[self.window - 1:]
+        starts = np.vstack([np.zeros((1, values.shape[1])), cumsum[:-self.window]])
+        
+        return (ends - starts)[-rows:]
+    
+    def update(self, closes: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Processa um bloco de fechamentos alinhados
+        
+        Args:
+            closes: Matriz B×N de fechamentos (linhas em ordem cronológica;
+                NaN repete o último fechamento do símbolo)
+        
+        Returns:
+            Arrays do bloco: 'correlation' e 'beta' (B×N) contra o
+            benchmark e 'dispersion' (B)
+        """
+        closes = np.asarray(closes, dtype=np.float64)
+        rows, b = len(closes), self._bench
+        w = self.window
+        
+        # Forward-fill a partir do último fechamento do bloco anterior
+        filled = np.vstack([self._last_close, closes])
+        last_valid = np.where(np.isnan(filled), 0, np.arange(rows + 1)[:, None])
+        np.maximum.accumulate(last_valid, axis=0, out=last_valid)
+        filled = filled[last_valid, np.arange(filled.shape[1])]
+        
+        prev, closes = filled[:-1], filled[1:]
+        self._last_close = closes[-1].copy()
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.log(closes / prev)
+        
+        valid = np.isfinite(returns)
+        returns[~valid] = 0.0
+        
+        # Bloco estendido com a janela anterior: as somas acumuladas ficam
+        # locais ao bloco, sem acumular erro ao longo de toda a série
+        ext = np.vstack([self._tail, returns])
+        ext_valid = np.vstack([self._tail_valid, valid])
+        
+        count = self._window_sums(ext_valid.astype(np.int32), rows)
+        s_x = self._window_sums(ext, rows)
+        s_xx = self._window_sums(ext * ext, rows)
+        s_xb = self._window_sums(ext * ext[:, b:b + 1], rows)
+        
+        full = (count == w) & (count[:, b:b + 1] == w)
+        mean = s_x / w
+        var = s_xx / w - mean * mean
+        cov = s_xb / w - mean * mean[:, b:b + 1]
+        var_b = var[:, b:b + 1]
+        full &= (var > _MIN_VARIANCE) & (var_b > _MIN_VARIANCE)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = np.where(full, cov / np.sqrt(var * var_b), np.nan)
+            beta = np.where(full, cov / var_b, np.nan)
+            
+            # Dispersão: desvio padrão entre ativos do retorno da janela
+            window_full = count == w
+            n_assets = window_full.sum(axis=1)
+            avg = np.where(window_full, s_x, 0).sum(axis=1) / n_assets
+            dispersion = np.sqrt(np.where(window_full, (s_x - avg[:, None]) ** 2, 0)
+                                 .sum(axis=1) / n_assets)
+        
+        if self.track_matrix:
+            self._update_matrix(ext, rows)
+        
+        self._tail = ext[-w:].copy()
+        self._tail_valid = ext_valid[-w:].copy()
+        
+        self.latest = {'correlation': correlation[-1], 'beta': beta[-1],
+                       'dispersion': dispersion[-1]}
+        
+        return {'correlation': correlation, 'beta': beta, 'dispersion': dispersion}
+    
+    def _update_matrix(self, ext: np.ndarray, rows: int):
+        """Atualiza X'X da janela somando barras novas e tirando as que saem"""
+        w = self.window
+        
+        if rows >= w:
+            window = ext[-w:]
+            self._xtx = window.T @ window
+            self._sum = window.sum(axis=0)
+            return
+        
+        added, removed = ext[w:], ext[:rows]
+        self._xtx += added.T @ added - removed.T @ removed
+        self._sum += added.sum(axis=0) - removed.sum(axis=0)
+    
+    def correlation_matrix(self) -> np.ndarray:
+        """
+        Matriz de correlação N×N da janela atual
+        
+        Símbolos sem janela completa ficam com NaN.
+        """
+        if not self.track_matrix:
+            raise ValueError("Engine criada com track_matrix=False")
+        
+        w = self.window
+        mean = self._sum / w
+        cov = self._xtx / w - np.outer(mean, mean)
+        std = np.sqrt(np.clip(np.diag(cov), 0, None))
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.outer(std, std)
+        
+        incomplete = (self._tail_valid.sum(axis=0) < w) | (std ** 2 <= _MIN_VARIANCE)
+        corr[incomplete, :] = np.nan
+        corr[:, incomplete] = np.nan
+        
+        return corr
+    
+    def run(self, closes: np.ndarray, block_size: int = 1024) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Processa uma matriz de fechamentos em blocos de linhas
+        
+        Args:
+            closes: Matriz T×N de fechamentos alinhados
+            block_size: Linhas por bloco
+        
+        Yields:
+            Resultado de update() para cada bloco
+        """
+        for start in range(0, len(closes), block_size):
+            yield self.update(closes[start:start + block_size])
+    
+    def summary(self) -> Dict[str, Dict]:
+        """
+        Valores mais recentes por símbolo
+        
+        Returns:
+            Dicionário símbolo -> {'correlacao', 'beta', 'dispersao'}
+        """
+        return {
+            symbol: {
+                'correlacao': float(self.latest['correlation'][i]),
+                'beta': float(self.latest['beta'][i]),
+                'dispersao': float(self.latest['dispersion'])
+            }
+            for i, symbol in enumerate(self.symbols)
+        }
+
+
+def cross_asset_analysis(market_data: MarketDataBuffer, benchmark: str, window: int = 100,
+                         block_size: int = 1024) -> Dict[str, Dict]:
+    """
+    Alinha os símbolos do buffer bloco a bloco e calcula as métricas mais recentes
+    
+    Args:
+        market_data: Buffer com linhas de vários símbolos
+        benchmark: Símbolo de referência
+        window: Janela móvel em barras
+        block_size: Linhas processadas por vez
+    
+    Returns:
+        Dicionário símbolo -> {'correlacao', 'beta', 'dispersao'}
+    """
+    symbols = list(market_data.symbols)
+    engine = CrossAssetEngine(symbols, benchmark, window=window, track_matrix=False)
+    
+    for _, closes in iter_aligned_closes(market_data, symbols, block_size):
+        engine.update(closes)
+    
+    return engine.summary()
\ No newline at end of file
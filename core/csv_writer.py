@@ -7,7 +7,8 @@ import pandas as pd
 from datetime import datetime
 import os
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Union
+from core.market_buffer import MarketDataBuffer
 
 class CSVWriter:
     """Gerencia escrita de dados em CSV"""
@@ -26,12 +27,12 @@ class CSVWriter:
         """Garante que diretório de dados existe"""
         Path(self.config.data_dir).mkdir(parents=True, exist_ok=True)
     
-    def save(self, market_data: List[Dict]) -> str:
+    def save(self, market_data: Union[MarketDataBuffer, List[Dict]]) -> str:
         """
         Salva dados em CSV
         
         Args:
-            market_data: Lista de dados de mercado
+            market_data: Buffer colunar ou lista de dados de mercado
             
         Returns:
             Caminho do arquivo CSV gerado
@@ -41,14 +42,19 @@ class CSVWriter:
         filename = f"{timestamp}.csv"
         filepath = os.path.join(self.config.data_dir, filename)
         
-        # Converte para DataFrame
-        df = pd.DataFrame(market_data)
-        
-        # Ordena por período e consulta
-        df = df.sort_values(['period_idx', 'query_idx'])
-        
-        # Formata timestamp
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        if isinstance(market_data, MarketDataBuffer):
+            # Ordena no próprio buffer e usa seus arrays sem cópia
+            market_data.sort_by_query()
+            df = market_data.to_frame()
+        else:
+            # Converte para DataFrame
+            df = pd.DataFrame(market_data)
+            
+            # Ordena por período e consulta
+            df = df.sort_values(['period_idx', 'query_idx'])
+            
+            # Formata timestamp
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
         
         # Salva CSV
         df.to_csv(filepath, index=False)
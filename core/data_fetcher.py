@@ -4,13 +4,110 @@ Suporta múltiplas APIs: Binance, Polygon, Yahoo Finance, etc.
 """
 
 import requests
-from typing import List, Dict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from bisect import bisect_left, bisect_right
+from zoneinfo import ZoneInfo
 import time
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from core.market_buffer import MarketDataBuffer
+
+MINUTE_MS = 60 * 1000
+DAY_MS = 24 * 60 * MINUTE_MS
+
+def _format_ms(timestamp_ms: int) -> str:
+    """Instante em ms como texto ISO (UTC), para mensagens de erro"""
+    return datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc).isoformat()
+
+class FetchError(Exception):
+    """Falha ao obter dados reais do provedor"""
+
+class _BarCache:
+    """Barras já baixadas de um símbolo/resolução e os intervalos cobertos"""
+    
+    def __init__(self):
+        self.bars: Dict[int, list] = {}
+        self.open_times: List[int] = []
+        self.covered: List[Tuple[int, int]] = []
+    
+    def missing(self, start_ms: int, end_ms: int) -> List[Tuple[int, int]]:
+        """Trechos de [início, fim] ainda não baixados"""
+        gaps = []
+        
+        for covered_start, covered_end in self.covered:
+            if covered_end < start_ms or covered_start > end_ms:
+                continue
+            if covered_start > start_ms:
+                gaps.append((start_ms, covered_start))
+            start_ms = max(start_ms, covered_end)
+        
+        if start_ms < end_ms:
+            gaps.append((start_ms, end_ms))
+        
+        return gaps
+    
+    def add(self, bars: List[list], start_ms: int, end_ms: int):
+        """Guarda barras de um trecho baixado e marca o trecho como coberto"""
+        for bar in bars:
+            self.bars[bar[0]] = bar
+        self.open_times = sorted(self.bars)
+        
+        merged = []
+        for interval in sorted(self.covered + [(start_ms, end_ms)]):
+            if merged and interval[0] <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], interval[1]))
+            else:
+                merged.append(interval)
+        self.covered = merged
+    
+    def trim(self, before_ms: int):
+        """Descarta barras e cobertura anteriores ao instante"""
+        cut = bisect_left(self.open_times, before_ms)
+        
+        if cut:
+            for open_ms in self.open_times[:cut]:
+                del self.bars[open_ms]
+            self.open_times = self.open_times[cut:]
+        
+        self.covered = [(max(start, before_ms), end) for start, end in self.covered
+                        if end > before_ms]
+    
+    def latest(self, before_ms: int) -> Optional[list]:
+        """Última barra aberta até o instante (inclusive)"""
+        idx = bisect_right(self.open_times, before_ms) - 1
+        return self.bars[self.open_times[idx]] if idx >= 0 else None
 
 class DataFetcher:
     """Busca dados de mercado de diferentes APIs"""
     
+    # Endereços padrão (config.api_base_url permite apontar para um stub local)
+    BASE_URLS = {
+        'binance': 'https://api.binance.com',
+        'polygon': 'https://api.polygon.io',
+        'yahoo': 'https://query1.finance.yahoo.com',
+        'alphavantage': 'https://www.alphavantage.co'
+    }
+    
+    # Intervalo mínimo entre requisições, em segundos (planos gratuitos)
+    RATE_LIMITS = {
+        'polygon': 12.0,       # 5 req/min
+        'yahoo': 0.5,
+        'alphavantage': 12.0   # 5 req/min
+    }
+    
+    # Tentativas por requisição quando a API responde 429
+    MAX_RETRIES = 3
+    
+    # Histórico disponível de barras de 1 minuto no Yahoo
+    YAHOO_MINUTE_DAYS = 30
+    
+    # Distância máxima entre consultas numa mesma janela de busca
+    # e recuo antes da primeira consulta (cobre mercado fechado)
+    WINDOW_GAP = {'minute': DAY_MS, 'day': 30 * DAY_MS}
+    LOOKBACK = {'minute': 3 * DAY_MS, 'day': 7 * DAY_MS}
+    
+    # Duração de cada barra: uma consulta só vê barras já fechadas
+    BAR_MS = {'minute': MINUTE_MS, 'day': DAY_MS}
+    
     def __init__(self, config):
         """
         Inicializa fetcher
@@ -19,38 +116,60 @@ class DataFetcher:
             config: Objeto de configuração
         """
         self.config = config
+        # Uma barra [abertura_ms, open, high, low, close, volume] por consulta
         self.api_map = {
             'binance': self._fetch_binance,
             'polygon': self._fetch_polygon,
             'yahoo': self._fetch_yahoo,
             'alphavantage': self._fetch_alphavantage
         }
+        # Provedores com endpoint de intervalo: uma requisição cobre
+        # uma janela inteira em vez de uma linha por consulta
+        self.range_map = {
+            'polygon': self._range_polygon,
+            'yahoo': self._range_yahoo,
+            'alphavantage': self._range_alphavantage
+        }
+        self._last_request = 0.0
+        
+        # Barras baixadas, reaproveitadas entre chamadas de fetch_all
+        # (os blocos de uma coleta compartilham o mesmo fetcher)
+        self._bar_cache: Dict[Tuple[str, str], _BarCache] = {}
+        self._series_cache: Dict[Tuple[str, str, str], List[list]] = {}
     
-    def fetch_all(self, queries: List[Dict]) -> List[Dict]:
+    def fetch_all(self, queries: List[Dict], resolution: Optional[str] = None) -> MarketDataBuffer:
         """
         Busca dados para todas as consultas
         
         Args:
             queries: Lista de consultas agendadas
+            resolution: Granularidade das barras de provedores de intervalo
+                (padrão: escolhida pelas próprias consultas)
             
         Returns:
-            Lista de dados de mercado
+            Buffer colunar com os dados de mercado, na ordem das consultas
         """
-        market_data = []
+        buffer = MarketDataBuffer(capacity=len(queries))
+        range_fetcher = self.range_map.get(self.config.api_provider)
+        
+        if range_fetcher:
+            for query, bar in zip(queries, self._fetch_range(queries, range_fetcher, resolution)):
+                self._append_data(buffer, query, bar)
+            return buffer
+        
         fetcher = self.api_map.get(self.config.api_provider, self._fetch_mock)
         
         for query in queries:
-            data = fetcher(query)
-            market_data.append(data)
+            self._append_data(buffer, query, fetcher(query))
             time.sleep(0.1)  # Rate limiting
         
-        return market_data
+        return buffer
     
-    def _fetch_binance(self, query: Dict) -> Dict:
+    def _fetch_binance(self, query: Dict) -> list:
         """Busca dados da Binance API"""
         try:
             timestamp_ms = int(query['timestamp'].timestamp() * 1000)
-            url = f"https://api.binance.com/api/v3/klines"
+            url = f"{self._base_url()}/api/v3/klines"
             params = {
                 'symbol': query['symbol'],
                 'interval': '1m',
@@ -63,28 +182,355 @@ class DataFetcher:
             if response.status_code == 200:
                 data = response.json()
                 if data:
-                    return self._format_data(query, data[0])
+                    return data[0]
         except:
             pass
         
-        return self._fetch_mock(query)
+        return self._fallback(query)
     
-    def _fetch_polygon(self, query: Dict) -> Dict:
+    def _fetch_polygon(self, query: Dict) -> list:
         """Busca dados da Polygon API (requer API key)"""
-        # Implementação para Polygon
-        return self._fetch_mock(query)
+        return self._fetch_range([query], self._range_polygon)[0]
     
-    def _fetch_yahoo(self, query: Dict) -> Dict:
+    def _fetch_yahoo(self, query: Dict) -> list:
         """Busca dados do Yahoo Finance"""
-        # Implementação para Yahoo
-        return self._fetch_mock(query)
+        return self._fetch_range([query], self._range_yahoo)[0]
     
-    def _fetch_alphavantage(self, query: Dict) -> Dict:
+    def _fetch_alphavantage(self, query: Dict) -> list:
         """Busca dados da AlphaVantage (requer API key)"""
-        # Implementação para AlphaVantage
+        return self._fetch_range([query], self._range_alphavantage)[0]
+    
+    def _fetch_range(self, queries: List[Dict],
+                     range_fetcher: Callable[[str, int, int, str], List[list]],
+                     resolution: Optional[str] = None) -> List[list]:
+        """
+        Busca dados em lote: agrupa consultas em janelas, baixa cada
+        janela de uma vez e associa cada consulta à última barra já
+        fechada no seu instante (a barra diária de hoje ainda está aberta)
+        
+        Trechos já baixados por chamadas anteriores não são pedidos de
+        novo; barras anteriores à janela mais antiga são descartadas.
+        
+        Args:
+            queries: Lista de consultas agendadas
+            range_fetcher: Função (símbolo, início_ms, fim_ms, resolução)
+                que devolve barras [abertura_ms, open, high, low, close, volume]
+            resolution: "minute" ou "day" (padrão: pelo espaçamento das consultas)
+        
+        Returns:
+            Barra de cada consulta, na ordem das consultas
+        
+        Raises:
+            FetchError: Janela que falhou ou consulta sem barra do provedor
+                (provedores de intervalo nunca recebem dados simulados)
+        """
+        provider = self.config.api_provider
+        
+        if provider in ('polygon', 'alphavantage') and not self.config.api_key:
+            raise ValueError(f"API key necessária para {provider}")
+        
+        resolution = resolution or self.resolution(queries)
+        bar_ms = self.BAR_MS[resolution]
+        by_symbol: Dict[str, List[Tuple[int, int]]] = {}
+        
+        for pos, query in enumerate(queries):
+            timestamp_ms = int(query['timestamp'].timestamp() * 1000)
+            by_symbol.setdefault(query['symbol'], []).append((timestamp_ms, pos))
+        
+        matches: List[Optional[list]] = [None] * len(queries)
+        
+        for symbol, points in by_symbol.items():
+            points.sort()
+            cache = self._bar_cache.setdefault((symbol, resolution), _BarCache())
+            windows = list(self._range_windows([ts for ts, _ in points], resolution))
+            cache.trim(windows[0][0])
+            
+            for window_start, window_end in windows:
+                for start_ms, end_ms in cache.missing(window_start, window_end):
+                    try:
+                        bars = range_fetcher(symbol, start_ms, end_ms, resolution)
+                    except (requests.RequestException, ValueError, KeyError,
+                            IndexError, TypeError) as e:
+                        # A URL da resposta traz a chave; a mensagem vai para o manifesto
+                        reason = str(e).replace(self.config.api_key, '***') if self.config.api_key else e
+                        raise FetchError(f"{provider}: falha ao buscar {symbol} de "
+                                         f"{_format_ms(start_ms)} a {_format_ms(end_ms)}: "
+                                         f"{reason}") from e
+                    
+                    cache.add(bars, start_ms, end_ms)
+            
+            for timestamp_ms, pos in points:
+                matches[pos] = cache.latest(timestamp_ms - bar_ms)
+        
+        for query, bar in zip(queries, matches):
+            if bar is None:
+                raise FetchError(f"Sem dados de {provider} para "
+                                 f"{query['symbol']} em {query['timestamp']}")
+        
+        return matches
+    
+    def resolution(self, queries: List[Dict]) -> str:
+        """
+        Escolhe a granularidade das barras pelo espaçamento das consultas
+        
+        Uma coleta em blocos decide uma vez, com todas as consultas: um
+        bloco com uma só consulta (ou só com o instante repetido entre dois
+        períodos) não tem espaçamento e cairia em barras de minuto.
+        
+        Returns:
+            "day" se consultas distam ao menos um dia, senão "minute"
+        """
+        timestamps = sorted({query['timestamp'].timestamp() for query in queries})
+        gaps = [b - a for a, b in zip(timestamps, timestamps[1:])]
+        
+        if gaps and min(gaps) * 1000 >= DAY_MS:
+            return 'day'
+        
+        return 'minute'
+    
+    def _range_windows(self, timestamps: List[int], resolution: str) -> Iterator[Tuple[int, int]]:
+        """
+        Agrupa instantes ordenados em janelas contíguas de busca
+        
+        Args:
+            timestamps: Instantes das consultas em ms, ordenados
+            resolution: "minute" ou "day"
+        
+        Yields:
+            Tuplas (início_ms, fim_ms)
+        """
+        if not timestamps:
+            return
+        
+        gap = self.WINDOW_GAP[resolution]
+        lookback = self.LOOKBACK[resolution]
+        start = end = timestamps[0]
+        
+        for ts in timestamps[1:]:
+            if ts - end > gap:
+                yield start - lookback, end
+                start = ts
+            end = ts
+        
+        yield start - lookback, end
+    
+    def _base_url(self) -> str:
+        """URL base do provedor atual"""
+        return (self.config.api_base_url or self.BASE_URLS[self.config.api_provider]).rstrip('/')
+    
+    def _request(self, url: str, params: Optional[Dict] = None) -> Dict:
+        """
+        Faz requisição GET respeitando o rate limit do provedor
+        
+        Args:
+            url: Endereço completo
+            params: Parâmetros de query string
+        
+        Returns:
+            JSON decodificado
+        """
+        min_interval = self.config.api_min_interval
+        if min_interval is None:
+            min_interval = self.RATE_LIMITS.get(self.config.api_provider, 0.1)
+        
+        for _ in range(self.MAX_RETRIES):
+            wait = self._last_request + min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            
+            self._last_request = time.monotonic()
+            response = requests.get(url, params=params, timeout=10,
+                                    headers={'User-Agent': 'Mozilla/5.0 AnalisFin'})
+            
+            if response.status_code == 429:
+                try:
+                    time.sleep(float(response.headers.get('Retry-After', min_interval)))
+                except ValueError:
+                    time.sleep(min_interval)
+                continue
+            
+            response.raise_for_status()
+            return response.json()
+        
+        raise requests.HTTPError(f"Rate limit excedido: {url}")
+    
+    def _range_polygon(self, symbol: str, start_ms: int, end_ms: int,
+                       resolution: str) -> List[list]:
+        """
+        Busca barras agregadas da Polygon (/v2/aggs), seguindo next_url
+        
+        Returns:
+            Lista de barras [abertura_ms, open, high, low, close, volume]
+        """
+        url = (f"{self._base_url()}/v2/aggs/ticker/{symbol}/range/1/"
+               f"{resolution}/{start_ms}/{end_ms}")
+        params = {'adjusted': 'true', 'sort': 'asc', 'limit': 50000,
+                  'apiKey': self.config.api_key}
+        bars = []
+        
+        while url:
+            data = self._request(url, params)
+            
+            for row in data.get('results') or []:
+                bars.append([row['t'], row['o'], row['h'], row['l'], row['c'], row['v']])
+            
+            # next_url já carrega o cursor; só falta a chave
+            url = data.get('next_url')
+            params = {'apiKey': self.config.api_key}
+        
+        return bars
+    
+    def _range_yahoo(self, symbol: str, start_ms: int, end_ms: int,
+                     resolution: str) -> List[list]:
+        """
+        Busca barras do Yahoo Finance (/v8/finance/chart)
+        
+        Barras de 1 minuto são limitadas a 8 dias por requisição, então
+        o intervalo é percorrido em blocos de 7 dias; o Yahoo só guarda
+        os últimos 30 dias nessa resolução.
+        
+        Returns:
+            Lista de barras [abertura_ms, open, high, low, close, volume]
+        """
+        if resolution == 'minute':
+            oldest_ms = int(time.time() * 1000) - self.YAHOO_MINUTE_DAYS * DAY_MS + MINUTE_MS
+            
+            if end_ms < oldest_ms:
+                raise ValueError(f"Yahoo só fornece barras de 1 minuto dos últimos "
+                                 f"{self.YAHOO_MINUTE_DAYS} dias")
+            
+            start_ms = max(start_ms, oldest_ms)
+        
+        url = f"{self._base_url()}/v8/finance/chart/{symbol}"
+        interval = '1m' if resolution == 'minute' else '1d'
+        chunk_ms = 7 * DAY_MS if resolution == 'minute' else end_ms - start_ms + DAY_MS
+        bars = []
+        chunk_start = start_ms
+        
+        while chunk_start <= end_ms:
+            chunk_end = min(chunk_start + chunk_ms, end_ms + MINUTE_MS)
+            params = {
+                'period1': chunk_start // 1000,
+                'period2': chunk_end // 1000,
+                'interval': interval,
+                'includePrePost': 'false'
+            }
+            
+            data = self._request(url, params)
+            chart = data['chart']
+            
+            if chart.get('error') or not chart.get('result'):
+                error = chart.get('error') or {}
+                raise ValueError(error.get('description') or f"Sem dados para {symbol}")
+            
+            result = chart['result'][0]
+            quote = result['indicators']['quote'][0]
+            rows = zip(result.get('timestamp') or [], quote['open'], quote['high'],
+                       quote['low'], quote['close'], quote['volume'])
+            
+            for ts, open_, high, low, close, volume in rows:
+                if None in (open_, high, low, close):
+                    continue  # Minuto sem negócios
+                bars.append([ts * 1000, open_, high, low, close, volume or 0])
+            
+            chunk_start = chunk_end
+        
+        return bars
+    
+    def _range_alphavantage(self, symbol: str, start_ms: int, end_ms: int,
+                            resolution: str) -> List[list]:
+        """
+        Busca séries da AlphaVantage (TIME_SERIES_INTRADAY mês a mês
+        ou TIME_SERIES_DAILY completa)
+        
+        Returns:
+            Lista de barras [abertura_ms, open, high, low, close, volume]
+        """
+        url = f"{self._base_url()}/query"
+        
+        if resolution == 'minute':
+            requests_params = [{
+                'function': 'TIME_SERIES_INTRADAY',
+                'interval': '1min',
+                'month': month,
+                'outputsize': 'full'
+            } for month in self._months_between(start_ms, end_ms)]
+            series_key = 'Time Series (1min)'
+            time_format = '%Y-%m-%d %H:%M:%S'
+        else:
+            requests_params = [{'function': 'TIME_SERIES_DAILY', 'outputsize': 'full'}]
+            series_key = 'Time Series (Daily)'
+            time_format = '%Y-%m-%d'
+        
+        # Cada mês vem inteiro: blocos seguintes no mesmo mês reaproveitam a
+        # resposta; meses anteriores à janela são descartados
+        first = (symbol, requests_params[0]['function'], requests_params[0].get('month', ''))
+        self._series_cache = {key: series for key, series in self._series_cache.items()
+                              if key[:2] != first[:2] or key >= first}
+        bars = []
+        
+        for params in requests_params:
+            key = (symbol, params['function'], params.get('month', ''))
+            
+            if key not in self._series_cache:
+                params.update({'symbol': symbol, 'apikey': self.config.api_key})
+                self._series_cache[key] = self._alphavantage_series(url, params, series_key,
+                                                                    time_format)
+            
+            bars.extend(bar for bar in self._series_cache[key] if start_ms <= bar[0] <= end_ms)
+        
+        return bars
+    
+    def _alphavantage_series(self, url: str, params: Dict, series_key: str,
+                             time_format: str) -> List[list]:
+        """
+        Baixa e converte uma série completa da AlphaVantage
+        
+        Returns:
+            Lista de barras [abertura_ms, open, high, low, close, volume]
+        """
+        data = self._request(url, params)
+        
+        # Erros e limite de uso chegam com status 200
+        for key in ('Error Message', 'Note', 'Information'):
+            if key in data:
+                raise ValueError(data[key])
+        
+        meta = data['Meta Data']
+        tz_name = next((v for k, v in meta.items() if 'Time Zone' in k), 'US/Eastern')
+        tz = ZoneInfo(tz_name)
+        bars = []
+        
+        for stamp, row in data[series_key].items():
+            opened = datetime.strptime(stamp, time_format).replace(tzinfo=tz)
+            bars.append([int(opened.timestamp() * 1000), row['1. open'], row['2. high'],
+                         row['3. low'], row['4. close'], row['5. volume']])
+        
+        return bars
+    
+    @staticmethod
+    def _months_between(start_ms: int, end_ms: int) -> List[str]:
+        """Meses (YYYY-MM) que cobrem o intervalo, com folga de um dia"""
+        current = datetime.fromtimestamp(start_ms / 1000, tz=timezone.utc) - timedelta(days=1)
+        last = datetime.fromtimestamp(end_ms / 1000, tz=timezone.utc) + timedelta(days=1)
+        months = []
+        year, month = current.year, current.month
+        
+        while (year, month) <= (last.year, last.month):
+            months.append(f"{year:04d}-{month:02d}")
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        
+        return months
+    
+    def _fallback(self, query: Dict) -> list:
+        """Dados simulados para consulta sem resposta, se ativados (senão erro)"""
+        if not self.config.fallback_mock:
+            raise FetchError(f"Sem dados de {self.config.api_provider} para "
+                             f"{query['symbol']} em {query['timestamp']}")
+        
         return self._fetch_mock(query)
     
-    def _fetch_mock(self, query: Dict) -> Dict:
+    def _fetch_mock(self, query: Dict) -> list:
         """Gera dados simulados para testes"""
         import random
         
@@ -92,18 +538,17 @@ class DataFetcher:
         variation = random.uniform(-1000, 1000)
         price = base_price + variation
         
-        return {
-            'timestamp': query['timestamp'],
-            'symbol': query['symbol'],
-            'open': price,
-            'high': price * 1.002,
-            'low': price * 0.998,
-            'close': price + random.uniform(-100, 100),
-            'volume': random.randint(1000000, 10000000),
-            'period_idx': query['period_idx'],
-            'query_idx': query['query_idx'],
-            'percentage': query['percentage']
-        }
+        return [int(query['timestamp'].timestamp() * 1000),
+                price,
+                price * 1.002,
+                price * 0.998,
+                price + random.uniform(-100, 100),
+                random.randint(1000000, 10000000)]
+    
+    def _append_data(self, buffer: MarketDataBuffer, query: Dict, api_data):
+        """Grava dados da API direto no buffer, sem dicionário intermediário"""
+        buffer.append(query, float(api_data[1]), float(api_data[2]), float(api_data[3]),
+                      float(api_data[4]), float(api_data[5]))
     
     def _format_data(self, query: Dict, api_data) -> Dict:
         """Formata dados da API para formato padrão"""
@@ -0,0 +1,275 @@
+"""
+Market Buffer - Armazenamento colunar dos dados coletados
+Substitui a lista de dicionários entre fetcher, writer e analyzer
+"""
+
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_EPOCH_NAIVE = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Colunas numéricas e seus tipos (ordem do CSV)
+COLUMNS = {
+    'timestamp': np.int64,      # ns desde a época (UTC, ou horário de parede sem fuso)
+    'symbol': np.int32,         # código no dicionário de símbolos
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.float64,
+    'period_idx': np.int32,
+    'query_idx': np.int32,
+    'percentage': np.float64
+}
+
+class MarketDataBuffer:
+    """Buffer colunar com arrays NumPy tipados e crescimento geométrico"""
+    
+    def __init__(self, capacity: int = 1024):
+        """
+        Inicializa buffer
+        
+        Args:
+            capacity: Quantidade inicial de linhas reservadas
+        """
+        self._size = 0
+        self._capacity = max(1, capacity)
+        self._arrays = {name: np.empty(self._capacity, dtype=dtype)
+                        for name, dtype in COLUMNS.items()}
+        self.symbols: List[str] = []
+        self._symbol_codes: Dict[str, int] = {}
+        self.tz: Optional[tzinfo] = None
+        self._tz_aware: Optional[bool] = None
+    
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict]) -> 'MarketDataBuffer':
+        """Cria buffer a partir de dicionários no formato de _format_data"""
+        rows = list(rows)
+        buffer = cls(capacity=len(rows))
+        
+        for row in rows:
+            buffer.append_row(row)
+        
+        return buffer
+    
+    @classmethod
+    def load(cls, path: str) -> 'MarketDataBuffer':
+        """Carrega buffer salvo com save()"""
+        with np.load(path) as data:
+            buffer = cls(capacity=len(data['timestamp']))
+            buffer._size = len(data['timestamp'])
+            
+            for name in COLUMNS:
+                buffer._arrays[name][:buffer._size] = data[name]
+            
+            buffer.symbols = [str(symbol) for symbol in data['symbols']]
+            buffer._symbol_codes = {symbol: code for code, symbol in enumerate(buffer.symbols)}
+            tz_name = str(data['tz'])
+        
+        if buffer._size:
+            buffer._tz_aware = bool(tz_name)
+            buffer.tz = ZoneInfo(tz_name) if tz_name else None
+        
+        return buffer
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def _grow(self):
+        """Dobra a capacidade dos arrays"""
+        self._capacity *= 2
+        
+        for name, array in self._arrays.items():
+            grown = np.empty(self._capacity, dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            self._arrays[name] = grown
+    
+    def _symbol_code(self, symbol: str) -> int:
+        """Devolve o código interno do símbolo, registrando se novo"""
+        code = self._symbol_codes.get(symbol)
+        
+        if code is None:
+            code = len(self.symbols)
+            self._symbol_codes[symbol] = code
+            self.symbols.append(symbol)
+        
+        return code
+    
+    def _timestamp_ns(self, timestamp: datetime) -> int:
+        """Converte datetime em ns inteiros sem perda de precisão"""
+        aware = timestamp.tzinfo is not None
+        
+        if self._tz_aware is None:
+            self._tz_aware = aware
+            self.tz = timestamp.tzinfo
+        elif aware != self._tz_aware:
+            raise ValueError("Não é possível misturar timestamps com e sem fuso horário")
+        
+        epoch = _EPOCH_UTC if aware else _EPOCH_NAIVE
+        return (timestamp - epoch) // _MICROSECOND * 1000
+    
+    def append(self, query: Dict, open_: float, high: float, low: float,
+               close: float, volume: float):
+        """
+        Adiciona uma linha a partir da consulta e dos valores OHLCV
+        
+        Args:
+            query: Consulta agendada (timestamp, symbol, índices, percentage)
+            open_, high, low, close, volume: Valores da barra
+        """
+        if self._size == self._capacity:
+            self._grow()
+        
+        i = self._size
+        arrays = self._arrays
+        arrays['timestamp'][i] = self._timestamp_ns(query['timestamp'])
+        arrays['symbol'][i] = self._symbol_code(query['symbol'])
+        arrays['open'][i] = open_
+        arrays['high'][i] = high
+        arrays['low'][i] = low
+        arrays['close'][i] = close
+        arrays['volume'][i] = volume
+        arrays['period_idx'][i] = query['period_idx']
+        arrays['query_idx'][i] = query['query_idx']
+        arrays['percentage'][i] = query['percentage']
+        self._size += 1
+    
+    def append_row(self, row: Dict):
+        """Adiciona uma linha no formato de dicionário de _format_data"""
+        self.append(row, row['open'], row['high'], row['low'], row['close'], row['volume'])
+    
+    def extend(self, other: 'MarketDataBuffer'):
+        """Anexa as linhas de outro buffer, remapeando os símbolos"""
+        if not len(other):
+            return
+        
+        if self._tz_aware is None:
+            self._tz_aware, self.tz = other._tz_aware, other.tz
+        elif other._tz_aware != self._tz_aware:
+            raise ValueError("Não é possível misturar timestamps com e sem fuso horário")
+        
+        while self._capacity < self._size + len(other):
+            self._grow()
+        
+        codes = np.array([self._symbol_code(symbol) for symbol in other.symbols], dtype=np.int32)
+        end = self._size + len(other)
+        
+        for name in COLUMNS:
+            values = other.column(name)
+            self._arrays[name][self._size:end] = codes[values] if name == 'symbol' else values
+        
+        self._size = end
+    
+    def append_arrays(self, symbol: str, columns: Dict[str, np.ndarray],
+                      tz: Optional[tzinfo] = timezone.utc):
+        """
+        Anexa várias linhas de um mesmo símbolo de uma vez
+        
+        Args:
+            symbol: Símbolo de todas as linhas
+            columns: Arrays por coluna; 'timestamp' em ns desde a época
+                (UTC se tz for informado). Colunas ausentes ficam zeradas
+            tz: Fuso dos timestamps (None para horário de parede)
+        """
+        count = len(columns['timestamp'])
+        if not count:
+            return
+        
+        if self._tz_aware is None:
+            self._tz_aware, self.tz = tz is not None, tz
+        elif (tz is not None) != self._tz_aware:
+            raise ValueError("Não é possível misturar timestamps com e sem fuso horário")
+        
+        while self._capacity < self._size + count:
+            self._grow()
+        
+        end = self._size + count
+        
+        for name in COLUMNS:
+            if name == 'symbol':
+                values = self._symbol_code(symbol)
+            else:
+                values = columns.get(name, 0)
+            self._arrays[name][self._size:end] = values
+        
+        self._size = end
+    
+    def save(self, path: str):
+        """
+        Salva as linhas preenchidas em arquivo .npz
+        
+        Args:
+            path: Caminho do arquivo (deve terminar em .npz)
+        """
+        tz_name = ''
+        if self._tz_aware:
+            tz_name = getattr(self.tz, 'key', None) or str(self.tz)
+        
+        np.savez(path, symbols=np.array(self.symbols, dtype=str),
+                 tz=np.array(tz_name), **self.columns())
+    
+    def column(self, name: str) -> np.ndarray:
+        """Visão (sem cópia) das linhas preenchidas de uma coluna"""
+        return self._arrays[name][:self._size]
+    
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Visões (sem cópia) de todas as colunas"""
+        return {name: self.column(name) for name in COLUMNS}
+    
+    def is_sorted(self) -> bool:
+        """Indica se as linhas já estão ordenadas por período e consulta"""
+        period, query = self.column('period_idx'), self.column('query_idx')
+        step = np.diff(period)
+        
+        return bool(np.all((step > 0) | ((step == 0) & (np.diff(query) >= 0))))
+    
+    def sort_by_query(self):
+        """Ordena as linhas por período e consulta (estável), se necessário"""
+        if self.is_sorted():
+            return
+        
+        order = np.lexsort((self.column('query_idx'), self.column('period_idx')))
+        
+        for name in COLUMNS:
+            self._arrays[name][:self._size] = self.column(name)[order]
+    
+    def timestamps(self) -> pd.DatetimeIndex:
+        """Timestamps como DatetimeIndex (no fuso original, se houver)"""
+        values = self.column('timestamp').view('datetime64[ns]')
+        
+        if self._tz_aware:
+            return pd.DatetimeIndex(values).tz_localize('UTC').tz_convert(self.tz)
+        
+        return pd.DatetimeIndex(values, copy=False)
+    
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Monta DataFrame sobre os arrays do buffer
+        
+        As colunas numéricas não são copiadas; o símbolo vira categoria
+        reaproveitando os códigos internos.
+        
+        Returns:
+            DataFrame com as colunas do CSV
+        """
+        data = self.columns()
+        data['timestamp'] = self.timestamps()
+        data['symbol'] = pd.Categorical.from_codes(data['symbol'], categories=self.symbols)
+        
+        return pd.DataFrame(data, copy=False)
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes ocupados pelas linhas preenchidas"""
+        return sum(array.itemsize for array in self._arrays.values()) * self._size
+    
+    @property
+    def bytes_per_row(self) -> int:
+        """Bytes por linha armazenada"""
+        return sum(array.itemsize for array in self._arrays.values())
\ No newline at end of file
@@ -4,9 +4,30 @@ Calcula janelas de tempo com base nos parâmetros configurados
 """
 
 from datetime import datetime, timedelta
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+from zoneinfo import ZoneInfo
 import re
 
+import numpy as np
+import pandas as pd
+
+# Unidades com duração de calendário (não fixa)
+CALENDAR_UNITS = {'mes': 1, 'ano': 12}
+
+# Unidades menores que um dia: calculadas em tempo absoluto (UTC), para
+# que mudanças de horário de verão não encurtem nem alonguem janelas
+SUB_DAY_UNITS = ('seg', 'min', 'hora')
+
+# Âncoras das grades de alinhamento (semanas começam na segunda-feira)
+_EPOCH = np.datetime64('1970-01-01T00:00:00', 'ns')
+_WEEK_EPOCH = np.datetime64('1970-01-05T00:00:00', 'ns')
+
+# Início mais antigo representável em datetime64[ns], com um dia de folga
+# para a conversão de fuso (em ns e em meses desde 1970-01)
+_MIN_NS = pd.Timestamp.min.value + 24 * 3600 * 10**9
+_MIN_MONTH = int(np.datetime64(_MIN_NS, 'ns').astype('datetime64[M]').astype(np.int64)) + 1
+
+
 class PeriodManager:
     """Gerencia cálculo de janelas de tempo"""
     
@@ -18,29 +39,51 @@ class PeriodManager:
             config: Objeto de configuração
         """
         self.config = config
-        self.period_duration = self._parse_period(config.period)
+        self.period_value, self.period_unit = self.parse_unit(config.period)
+        self.period_duration = self.parse_period(config.period)
+        self.tz = ZoneInfo(config.timezone) if config.timezone else None
     
-    def _parse_period(self, period_str: str) -> timedelta:
+    @staticmethod
+    def parse_unit(period_str: str) -> Tuple[int, str]:
         """
-        Converte string de período em timedelta
+        Extrai número e unidade de uma string de período
         
         Args:
-            period_str: String como "10min", "1hora", "1dia"
-            
+            period_str: String como "30seg", "10min", "1hora", "1dia"
+        
         Returns:
-            timedelta correspondente
+            Tupla (valor, unidade)
         """
         # Regex para extrair número e unidade
-        match = re.match(r'(\d+)\s*(min|hora|dia|semana|mes|ano)s?', period_str.lower())
+        match = re.match(r'(\d+)\s*(min|hora|dia|semana|mes|ano|seg)s?', period_str.lower())
         
         if not match:
             raise ValueError(f"Formato de período inválido: {period_str}")
         
         value = int(match.group(1))
-        unit = match.group(2)
+        
+        if value <= 0:
+            raise ValueError(f"Período deve ser positivo: {period_str}")
+        
+        return value, match.group(2)
+    
+    @staticmethod
+    def parse_period(period_str: str) -> timedelta:
+        """
+        Converte string de período em timedelta
+        
+        Args:
+            period_str: String como "30seg", "10min", "1hora", "1dia"
+            
+        Returns:
+            timedelta correspondente (mês e ano são aproximados;
+            generate_periods usa o calendário real)
+        """
+        value, unit = PeriodManager.parse_unit(period_str)
         
         # Mapeamento de unidades
         units = {
+            'seg': timedelta(seconds=value),
             'min': timedelta(minutes=value),
             'hora': timedelta(hours=value),
             'dia': timedelta(days=value),
@@ -51,6 +94,190 @@ class PeriodManager:
         
         return units.get(unit, timedelta(minutes=value))
     
+    def _reference_time(self) -> datetime:
+        """
+        Define o instante de referência (fim do último período)
+        
+        Usa config.as_of quando informado, senão o horário atual. Com fuso
+        configurado, o valor é devolvido com esse fuso; sem fuso, como
+        horário de parede local (ingênuo).
+        
+        Returns:
+            datetime de referência
+        """
+        as_of: Optional[datetime] = self.config.as_of
+        
+        if as_of is None:
+            return datetime.now(self.tz)
+        
+        if self.tz is None:
+            return as_of.astimezone().replace(tzinfo=None) if as_of.tzinfo else as_of
+        
+        if as_of.tzinfo is None:
+            # Horário ingênuo é interpretado no fuso configurado
+            return as_of.replace(tzinfo=self.tz)
+        
+        return as_of.astimezone(self.tz)
+    
+    def generate_period_bounds(self) -> Tuple[pd.DatetimeIndex, pd.DatetimeIndex]:
+        """
+        Gera limites de todos os períodos com aritmética vetorizada
+        
+        Com config.align_periods ativo, as janelas são encaixadas nos
+        limites do intervalo (múltiplos de minuto/hora, meia-noite,
+        segunda-feira, início do mês ou do ano) e terminam no último
+        limite completo antes da referência, de modo que execuções
+        diferentes consultem os mesmos instantes.
+        
+        Com fuso configurado, segundos, minutos e horas são contados em
+        tempo absoluto: toda janela tem a mesma duração, inclusive nos dias
+        de mudança de horário de verão. Dias, semanas, meses e anos seguem
+        o horário de parede (um dia de mudança tem 23 ou 25 horas).
+        
+        Returns:
+            Tupla (inícios, fins) em ordem cronológica
+        
+        Raises:
+            ValueError: Se o primeiro período começa antes de pd.Timestamp.min
+        """
+        n = self.config.qtd_periodo
+        ref_time = self._reference_time()
+        align = self.config.align_periods
+        
+        if self.tz is not None and self.period_unit in SUB_DAY_UNITS:
+            return self._absolute_bounds(ref_time, n, align)
+        
+        ref = np.datetime64(ref_time.replace(tzinfo=None), 'ns')
+        
+        if self.period_unit in CALENDAR_UNITS:
+            starts, ends = self._calendar_bounds(ref, n, align)
+        else:
+            step = np.timedelta64(self.period_duration, 'ns')
+            
+            if align:
+                epoch = _WEEK_EPOCH if self.period_unit == 'semana' else _EPOCH
+                ref = epoch + ((ref - epoch) // step) * step
+            
+            self._check_earliest(int(ref.astype(np.int64)) - n * int(step.astype(np.int64)))
+            ends = ref - self._steps(n) * step
+            starts = ends - step
+        
+        return self._localize(starts), self._localize(ends)
+    
+    def _absolute_bounds(self, ref: datetime, n: int,
+                         align: bool) -> Tuple[pd.DatetimeIndex, pd.DatetimeIndex]:
+        """
+        Calcula limites de períodos menores que um dia em ns UTC
+        
+        Args:
+            ref: Instante de referência (com fuso)
+            n: Quantidade de períodos
+            align: Se encaixa na grade do horário de parede
+        
+        Returns:
+            Tupla (inícios, fins) no fuso configurado
+        """
+        step = self.period_duration // timedelta(microseconds=1) * 1000
+        end = pd.Timestamp(ref).value
+        
+        if align:
+            # Grade do horário de parede, pelo deslocamento UTC da referência
+            offset = ref.utcoffset() // timedelta(microseconds=1) * 1000
+            end -= (end + offset) % step
+        
+        self._check_earliest(end - n * step)
+        ends = end - self._steps(n) * step
+        starts = ends - step
+        
+        return self._from_utc(starts), self._from_utc(ends)
+    
+    @staticmethod
+    def _steps(n: int) -> np.ndarray:
+        """Quantidade de períodos entre cada fim e a referência (n-1 ... 0)"""
+        return np.arange(n - 1, -1, -1, dtype=np.int64)
+    
+    def _check_earliest(self, earliest_ns: int):
+        """Confere, em inteiros sem limite, que o primeiro início é representável"""
+        if earliest_ns < _MIN_NS:
+            raise self._too_far_back()
+    
+    def _too_far_back(self) -> ValueError:
+        """Erro para períodos que recuam além do alcance de datetime64[ns]"""
+        return ValueError(f"{self.config.qtd_periodo} períodos de {self.config.period} "
+                          f"recuam além do limite de datas ({pd.Timestamp.min:%Y-%m-%d})")
+    
+    def _from_utc(self, values: np.ndarray) -> pd.DatetimeIndex:
+        """Converte ns UTC para o fuso configurado"""
+        index = pd.DatetimeIndex(values.view('datetime64[ns]'))
+        return index.tz_localize('UTC').tz_convert(self.tz)
+    
+    def _calendar_bounds(self, ref: np.datetime64, n: int,
+                         align: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calcula limites de períodos de mês/ano pelo calendário real
+        
+        Args:
+            ref: Instante de referência (horário de parede)
+            n: Quantidade de períodos
+            align: Se encaixa no início do mês/ano
+        
+        Returns:
+            Tupla (inícios, fins) como datetime64[ns]
+        """
+        months = self.period_value * CALENDAR_UNITS[self.period_unit]
+        ref_month = ref.astype('datetime64[M]')
+        
+        if align:
+            # Múltiplos de `months` contados a partir de 1970-01
+            idx = int(ref_month.astype(np.int64))
+            ref_month = np.datetime64(idx - idx % months, 'M')
+            offset = np.timedelta64(0, 'ns')
+        else:
+            offset = ref - ref_month.astype('datetime64[ns]')
+        
+        if int(ref_month.astype(np.int64)) - n * months < _MIN_MONTH:
+            raise self._too_far_back()
+        
+        end_months = ref_month - self._steps(n) * months
+        start_months = end_months - months
+        
+        return (self._month_offset(start_months, offset),
+                self._month_offset(end_months, offset))
+    
+    @staticmethod
+    def _month_offset(months: np.ndarray, offset: np.timedelta64) -> np.ndarray:
+        """
+        Soma um deslocamento ao início de cada mês, limitado ao último dia
+        
+        Args:
+            months: Meses como datetime64[M]
+            offset: Deslocamento desde o início do mês de referência
+        
+        Returns:
+            datetime64[ns]
+        """
+        day = np.timedelta64(1, 'D').astype('timedelta64[ns]')
+        first = months.astype('datetime64[ns]')
+        month_len = (months + 1).astype('datetime64[ns]') - first
+        
+        # Ex.: 31/03 recua para 28/02 mantendo o horário
+        days, time_of_day = offset // day, offset % day
+        days = np.minimum(days, month_len // day - 1)
+        
+        return first + days * day + time_of_day
+    
+    def _localize(self, values: np.ndarray) -> pd.DatetimeIndex:
+        """Aplica o fuso configurado a horários de parede"""
+        index = pd.DatetimeIndex(values)
+        
+        if self.tz is None:
+            return index
+        
+        # Horários ambíguos (fim do horário de verão) ficam no horário padrão
+        return index.tz_localize(self.tz,
+                                 ambiguous=np.zeros(len(index), dtype=bool),
+                                 nonexistent='shift_forward')
+    
     def generate_periods(self) -> List[Tuple[datetime, datetime]]:
         """
         Gera lista de períodos a serem analisados
@@ -58,16 +285,6 @@ class PeriodManager:
         Returns:
             Lista de tuplas (início, fim) para cada período
         """
-        periods = []
-        now = datetime.now()
-        
-        # Calcula períodos retroativamente
-        for i in range(self.config.qtd_periodo):
-            end_time = now - (self.period_duration * i)
-            start_time = end_time - self.period_duration
-            periods.append((start_time, end_time))
-        
-        # Inverte para ordem cronológica
-        periods.reverse()
+        starts, ends = self.generate_period_bounds()
         
-        return periods
\ No newline at end of file
+        return list(zip(starts.to_pydatetime(), ends.to_pydatetime()))
\ No newline at end of file
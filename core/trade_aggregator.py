@@ -0,0 +1,264 @@
+"""
+Trade Aggregator - Agrega negócios brutos em barras OHLCV
+Barras de tempo, de ticks ou de volume, numa única passada em blocos
+"""
+
+from datetime import timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.market_buffer import MarketDataBuffer
+from core.period_manager import CALENDAR_UNITS, PeriodManager
+
+# Bloco de negócios: (timestamp_ms, preço, quantidade)
+TradeChunk = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+BAR_TYPES = ('time', 'tick', 'volume')
+
+# Colunas do aggTrades da Binance (data.binance.vision)
+AGG_TRADES_COLUMNS = ['agg_trade_id', 'price', 'quantity', 'first_trade_id',
+                      'last_trade_id', 'transact_time', 'is_buyer_maker']
+
+class TradeAggregator:
+    """Agrega negócios em barras mantendo apenas a barra aberta em memória"""
+    
+    def __init__(self, symbol: str, bar_type: str = 'time', bar_size: str = '1min'):
+        """
+        Inicializa agregador
+        
+        Args:
+            symbol: Ativo dos negócios
+            bar_type: "time", "tick" ou "volume"
+            bar_size: Duração fixa ("30seg", "5min", "1dia", ...) para barras
+                de tempo; negócios por barra (tick) ou volume por barra (volume)
+        
+        Barras de volume fecham quando o volume acumulado do fluxo cruza
+        um múltiplo de bar_size; o negócio que cruza fica na barra que
+        fecha. Um negócio que cruza vários múltiplos encurta a barra
+        seguinte, mas o resultado não depende do tamanho dos blocos.
+        """
+        if bar_type not in BAR_TYPES:
+            raise ValueError(f"Tipo de barra inválido: {bar_type}")
+        
+        self.symbol = symbol
+        self.bar_type = bar_type
+        
+        if bar_type == 'time':
+            # Barras de tempo têm duração fixa: mês e ano variam no calendário
+            if PeriodManager.parse_unit(bar_size)[1] in CALENDAR_UNITS:
+                raise ValueError(f"Barras de tempo não aceitam mês/ano: {bar_size} "
+                                 f"(use dias ou semanas)")
+            self.size = PeriodManager.parse_period(bar_size) // pd.Timedelta(1, 'ms')
+        elif bar_type == 'tick':
+            self.size = int(bar_size)
+        else:
+            self.size = float(bar_size)
+        
+        if self.size <= 0:
+            raise ValueError(f"Tamanho de barra deve ser positivo: {bar_size}")
+        
+        self.trades = 0        # Negócios já processados
+        self.cum_volume = 0.0  # Volume já processado
+        self.bars = 0          # Barras já emitidas
+        self._open: Optional[Dict] = None
+    
+    def _keys(self, ts: np.ndarray, qty: np.ndarray) -> np.ndarray:
+        """Chave da barra de cada negócio (crescente ao longo do fluxo)"""
+        if self.bar_type == 'time':
+            return ts // self.size
+        
+        if self.bar_type == 'tick':
+            return (self.trades + np.arange(len(ts), dtype=np.int64)) // self.size
+        
+        # Volume acumulado antes de cada negócio: quem cruza o limite fecha a barra
+        before = self.cum_volume + np.cumsum(qty) - qty
+        return (before // self.size).astype(np.int64)
+    
+    def update(self, ts: np.ndarray, price: np.ndarray, qty: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Processa um bloco de negócios em ordem cronológica
+        
+        Args:
+            ts: Timestamps em ms
+            price: Preços
+            qty: Quantidades
+        
+        Returns:
+            Barras concluídas neste bloco (arrays por coluna)
+        """
+        ts = np.asarray(ts, dtype=np.int64)
+        price = np.asarray(price, dtype=np.float64)
+        qty = np.asarray(qty, dtype=np.float64)
+        
+        if not len(ts):
+            return self._empty()
+        
+        if np.any(np.diff(ts) < 0):
+            raise ValueError("Negócios fora de ordem cronológica")
+        
+        keys = self._keys(ts, qty)
+        
+        self.trades += len(ts)
+        self.cum_volume += float(qty.sum())
+        
+        # Segmentos contíguos com a mesma chave
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+        ends = np.append(starts[1:], len(ts))
+        
+        segments = {
+            'key': keys[starts],
+            'timestamp': ts[starts],
+            'open': price[starts],
+            'high': np.maximum.reduceat(price, starts),
+            'low': np.minimum.reduceat(price, starts),
+            'close': price[ends - 1],
+            'volume': np.add.reduceat(qty, starts)
+        }
+        
+        # Junta o primeiro segmento à barra aberta do bloco anterior
+        carried = self._open
+        if carried is not None:
+            if carried['key'] == segments['key'][0]:
+                segments['timestamp'][0] = carried['timestamp']
+                segments['open'][0] = carried['open']
+                segments['high'][0] = max(carried['high'], segments['high'][0])
+                segments['low'][0] = min(carried['low'], segments['low'][0])
+                segments['volume'][0] += carried['volume']
+            else:
+                segments = {name: np.insert(values, 0, carried[name])
+                            for name, values in segments.items()}
+        
+        # O último segmento pode continuar no próximo bloco
+        self._open = {name: values[-1] for name, values in segments.items()}
+        completed = {name: values[:-1] for name, values in segments.items()}
+        
+        return self._finish(completed)
+    
+    def flush(self) -> Dict[str, np.ndarray]:
+        """Fecha a barra aberta ao fim do fluxo"""
+        if self._open is None:
+            return self._empty()
+        
+        last = {name: np.array([value]) for name, value in self._open.items()}
+        self._open = None
+        
+        return self._finish(last)
+    
+    def _finish(self, bars: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Converte segmentos em barras no formato do buffer"""
+        if self.bar_type == 'time':
+            # Barras de tempo começam no limite da janela, não no 1º negócio
+            bars['timestamp'] = bars['key'] * self.size
+        
+        count = len(bars['key'])
+        del bars['key']
+        bars['timestamp'] = bars['timestamp'] * 1_000_000  # ms -> ns
+        bars['period_idx'] = np.arange(self.bars, self.bars + count)
+        self.bars += count
+        
+        return bars
+    
+    def _empty(self) -> Dict[str, np.ndarray]:
+        """Bloco sem barras concluídas"""
+        return {'timestamp': np.empty(0, dtype=np.int64)}
+    
+    def aggregate(self, chunks: Iterable[TradeChunk],
+                  buffer: Optional[MarketDataBuffer] = None) -> MarketDataBuffer:
+        """
+        Agrega um fluxo completo de negócios
+        
+        Args:
+            chunks: Blocos (timestamp_ms, preço, quantidade)
+            buffer: Buffer de destino (um novo é criado se omitido)
+        
+        Returns:
+            Buffer com as barras, pronto para CSVWriter e Analyzer
+        """
+        if buffer is None:
+            buffer = MarketDataBuffer()
+        
+        for ts, price, qty in chunks:
+            buffer.append_arrays(self.symbol, self.update(ts, price, qty), tz=timezone.utc)
+        
+        buffer.append_arrays(self.symbol, self.flush(), tz=timezone.utc)
+        
+        return buffer
+
+
+def read_agg_trades(path: str, chunk_size: int = 1_000_000) -> Iterator[TradeChunk]:
+    """
+    Lê arquivo de negócios agregados em blocos
+    
+    Aceita o CSV do aggTrades da Binance (com ou sem cabeçalho), JSON por
+    linha (.jsonl) ou a resposta da API gravada (.json), ambos no formato
+    {"p": preço, "q": quantidade, "T": ms}.
+    
+    Args:
+        path: Caminho do arquivo
+        chunk_size: Negócios por bloco
+    
+    Yields:
+        Blocos (timestamp_ms, preço, quantidade)
+    """
+    suffix = Path(path).suffix
+    
+    if suffix in ('.jsonl', '.json'):
+        if suffix == '.jsonl':
+            chunks = pd.read_json(path, lines=True, chunksize=chunk_size)
+        else:
+            # Resposta da API é um array único (no máximo 1000 negócios)
+            trades = pd.read_json(path)
+            chunks = (trades.iloc[i:i + chunk_size] for i in range(0, len(trades), chunk_size))
+        
+        for chunk in chunks:
+            yield (chunk['T'].to_numpy(np.int64), chunk['p'].to_numpy(np.float64),
+                   chunk['q'].to_numpy(np.float64))
+        return
+    
+    with open(path, encoding='utf-8') as f:
+        has_header = not f.readline().split(',')[0].strip().isdigit()
+    
+    reader = pd.read_csv(path, header=None, skiprows=1 if has_header else 0,
+                         usecols=[1, 2, 5], names=AGG_TRADES_COLUMNS,
+                         dtype={'price': np.float64, 'quantity': np.float64,
+                                'transact_time': np.int64},
+                         chunksize=chunk_size)
+    
+    for chunk in reader:
+        ts = chunk['transact_time'].to_numpy()
+        
+        # Arquivos recentes da Binance usam microssegundos
+        if len(ts) and ts[0] > 10**14:
+            ts = ts // 1000
+        
+        yield ts, chunk['price'].to_numpy(), chunk['quantity'].to_numpy()
+
+
+def simulated_trades(total: int, chunk_size: int = 1_000_000, start_ms: int = 1_700_000_000_000,
+                     price: float = 50000.0, seed: Optional[int] = None) -> Iterator[TradeChunk]:
+    """
+    Feed local de negócios simulados (passeio aleatório)
+    
+    Args:
+        total: Quantidade de negócios
+        chunk_size: Negócios por bloco
+        start_ms: Timestamp do primeiro negócio
+        price: Preço inicial
+        seed: Semente para reprodutibilidade
+    
+    Yields:
+        Blocos (timestamp_ms, preço, quantidade)
+    """
+    rng = np.random.default_rng(seed)
+    ts = start_ms
+    
+    for offset in range(0, total, chunk_size):
+        n = min(chunk_size, total - offset)
+        times = ts + np.cumsum(rng.integers(0, 50, n))
+        prices = price * np.exp(np.cumsum(rng.normal(0, 1e-4, n)))
+        ts, price = int(times[-1]), float(prices[-1])
+        
+        yield times, prices, rng.exponential(0.05, n)
\ No newline at end of file
@@ -9,15 +9,17 @@ Ponto de entrada principal da aplicação.
 import sys
 from rich.console import Console
 from rich.panel import Panel
-from rich.prompt import Prompt, IntPrompt
+from rich.prompt import Prompt, IntPrompt, Confirm
 from config.settings import Config
 from core.period_manager import PeriodManager
 from core.query_scheduler import QueryScheduler
-from core.data_fetcher import DataFetcher
+from core.collection_run import CollectionRun
 from core.csv_writer import CSVWriter
 from core.analyzer import Analyzer
+from core.trade_aggregator import BAR_TYPES, TradeAggregator, read_agg_trades, simulated_trades
 from utils.helpers import list_csv_files, generate_chart
 import os
+from pathlib import Path
 
 console = Console()
 
@@ -46,7 +48,9 @@ class AnalisFin:
         console.print("2 - Executar análise")
         console.print("3 - Ver CSVs salvos")
         console.print("4 - Gerar gráficos")
-        console.print("5 - Sair")
+        console.print("5 - Retomar coleta interrompida")
+        console.print("6 - Agregar negócios em barras")
+        console.print("7 - Sair")
         console.print()
     
     def configure_parameters(self):
@@ -72,6 +76,16 @@ class AnalisFin:
             default=self.config.qtd_periodo
         )
         
+        # Alinhamento das janelas
+        align_periods = Confirm.ask(
+            "Alinhar períodos aos limites do intervalo (ex: 14:00, 14:10)?",
+            default=self.config.align_periods
+        )
+        timezone = Prompt.ask(
+            "Fuso horário (ex: UTC, America/Sao_Paulo; vazio = local)",
+            default=self.config.timezone or ""
+        )
+        
         # API provider
         console.print("\nAPIs disponíveis: binance, polygon, yahoo, alphavantage")
         api_provider = Prompt.ask("API provider", default=self.config.api_provider)
@@ -82,49 +96,114 @@ class AnalisFin:
             period=period,
             qtd_consultas=qtd_consultas,
             qtd_periodo=qtd_periodo,
+            align_periods=align_periods,
+            timezone=timezone or None,
             api_provider=api_provider
         )
         
         console.print("\n[bold green]✓ Parâmetros configurados com sucesso![/bold green]")
         self.config.display()
     
-    def execute_analysis(self):
-        """Executa análise completa"""
+    def execute_analysis(self, run=None):
+        """
+        Executa análise completa
+        
+        Args:
+            run: Coleta a retomar (padrão: inicia uma nova)
+        """
         console.print("\n[bold yellow]EXECUTANDO ANÁLISE...[/bold yellow]\n")
         
         try:
+            run = run or CollectionRun(self.config)
+            
             # 1. Gerenciar períodos
             console.print("[cyan]► Calculando janelas de tempo...[/cyan]")
-            period_manager = PeriodManager(self.config)
+            period_manager = PeriodManager(run.config)
             periods = period_manager.generate_periods()
             console.print(f"  ✓ {len(periods)} períodos gerados")
             
             # 2. Agendar consultas
             console.print("[cyan]► Agendando consultas...[/cyan]")
-            scheduler = QueryScheduler(self.config)
+            scheduler = QueryScheduler(run.config)
             queries = scheduler.schedule_queries(periods)
             console.print(f"  ✓ {len(queries)} consultas agendadas")
             
             # 3. Buscar dados
-            console.print("[cyan]► Coletando dados do mercado...[/cyan]")
-            fetcher = DataFetcher(self.config)
-            market_data = fetcher.fetch_all(queries)
+            console.print(f"[cyan]► Coletando dados do mercado (coleta {run.run_id})...[/cyan]")
+            market_data = run.run(queries)
             console.print(f"  ✓ {len(market_data)} registros coletados")
             
             # 4. Salvar em CSV
             console.print("[cyan]► Salvando dados em CSV...[/cyan]")
-            writer = CSVWriter(self.config)
+            writer = CSVWriter(run.config)
             csv_path = writer.save(market_data)
             console.print(f"  ✓ Arquivo salvo: {csv_path}")
             
             # 5. Analisar dados
             console.print("[cyan]► Analisando tendências...[/cyan]")
-            analyzer = Analyzer(self.config)
-            result = analyzer.analyze(csv_path)
+            analyzer = Analyzer(run.config)
+            result = analyzer.analyze(csv_path, market_data)
             
             # 6. Exibir resultado
             self.display_results(result)
+        
+        except KeyboardInterrupt:
+            resume_hint = f" Retome com o ID {run.run_id}" if run else ""
+            console.print(f"\n[bold yellow]Coleta interrompida.{resume_hint}[/bold yellow]")
+        except Exception as e:
+            console.print(f"\n[bold red]✗ Erro: {str(e)}[/bold red]")
+    
+    def resume_collection(self):
+        """Retoma uma coleta interrompida pelo ID"""
+        console.print("\n[bold yellow]RETOMAR COLETA[/bold yellow]\n")
+        
+        runs_dir = Path(self.config.runs_dir)
+        runs = sorted((p.name for p in runs_dir.iterdir() if p.is_dir()), reverse=True) if runs_dir.exists() else []
+        
+        if not runs:
+            console.print("[yellow]Nenhuma coleta encontrada.[/yellow]")
+            return
+        
+        console.print("Coletas disponíveis: " + ", ".join(runs))
+        run_id = Prompt.ask("ID da coleta", default=runs[0])
+        
+        try:
+            run = CollectionRun.resume(run_id, self.config)
+        except ValueError as e:
+            console.print(f"\n[bold red]✗ Erro: {str(e)}[/bold red]")
+            return
+        
+        console.print(f"  {run.pending} bloco(s) pendente(s)")
+        self.execute_analysis(run)
+    
+    def aggregate_trades(self):
+        """Agrega negócios brutos em barras OHLCV e analisa"""
+        console.print("\n[bold yellow]AGREGAÇÃO DE NEGÓCIOS[/bold yellow]\n")
+        
+        path = Prompt.ask("Arquivo aggTrades (.csv, .jsonl, .json; vazio = feed simulado)", default="")
+        bar_type = Prompt.ask("Tipo de barra", choices=list(BAR_TYPES), default=self.config.bar_type)
+        console.print("\nExemplos: 30seg, 5min (time); 1000 (tick); 50.5 (volume)")
+        bar_size = Prompt.ask("Tamanho da barra", default=self.config.bar_size)
+        self.config.update(bar_type=bar_type, bar_size=bar_size)
+        
+        try:
+            # 1. Agregar negócios
+            console.print("[cyan]► Agregando negócios...[/cyan]")
+            aggregator = TradeAggregator(self.config.symbol, bar_type, bar_size)
+            trades = read_agg_trades(path) if path else simulated_trades(1_000_000)
+            market_data = aggregator.aggregate(trades)
+            console.print(f"  ✓ {aggregator.trades} negócios → {len(market_data)} barras")
+            
+            # 2. Salvar em CSV
+            console.print("[cyan]► Salvando dados em CSV...[/cyan]")
+            csv_path = CSVWriter(self.config).save(market_data)
+            console.print(f"  ✓ Arquivo salvo: {csv_path}")
             
+            # 3. Analisar dados
+            console.print("[cyan]► Analisando tendências...[/cyan]")
+            result = Analyzer(self.config).analyze(csv_path, market_data)
+            self.display_results(result)
+        
         except Exception as e:
             console.print(f"\n[bold red]✗ Erro: {str(e)}[/bold red]")
     
@@ -177,7 +256,7 @@ class AnalisFin:
         
         while self.running:
             self.show_menu()
-            choice = Prompt.ask("Escolha uma opção", choices=["1", "2", "3", "4", "5"])
+            choice = Prompt.ask("Escolha uma opção", choices=["1", "2", "3", "4", "5", "6", "7"])
             
             if choice == "1":
                 self.configure_parameters()
@@ -188,6 +267,10 @@ class AnalisFin:
             elif choice == "4":
                 self.generate_charts()
             elif choice == "5":
+                self.resume_collection()
+            elif choice == "6":
+                self.aggregate_trades()
+            elif choice == "7":
                 console.print("\n[bold blue]Encerrando AnalisFin... Até logo![/bold blue]")
                 self.running = False
             
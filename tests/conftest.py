@@ -0,0 +1,20 @@
+"""
+Fixtures compartilhadas dos testes
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tests.stub_server import StubServer
+
+
+@pytest.fixture
+def stub():
+    """Servidor local com as respostas gravadas das APIs"""
+    server = StubServer().start()
+    yield server
+    server.stop()
\ No newline at end of file
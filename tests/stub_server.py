@@ -0,0 +1,130 @@
+"""
+Stub Server - Serve respostas gravadas das APIs de mercado
+Aponte config.api_base_url para ele e valide os adaptadores offline
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+
+class StubServer:
+    """Servidor HTTP local que devolve fixtures JSON por rota"""
+    
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        """
+        Inicializa servidor (porta 0 escolhe uma livre)
+        
+        Args:
+            host: Endereço de escuta
+            port: Porta de escuta
+        """
+        self.requests: List[Tuple[str, Dict[str, str]]] = []
+        self._overrides: Dict[str, Tuple[int, Optional[str]]] = {}
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def base_url(self) -> str:
+        """URL a usar em config.api_base_url"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def override(self, prefix: str, fixture: Optional[str] = None, status: int = 200):
+        """
+        Troca a resposta de todas as rotas que começam com o prefixo
+        
+        Args:
+            prefix: Início do caminho (ex: "/v2/aggs")
+            fixture: Arquivo em fixtures/ (None = corpo vazio)
+            status: Código HTTP da resposta
+        """
+        self._overrides[prefix] = (status, fixture)
+    
+    def route(self, path: str, params: Dict[str, str]) -> Tuple[int, Optional[str]]:
+        """
+        Escolhe a resposta de uma requisição
+        
+        Returns:
+            Tupla (status HTTP, fixture)
+        """
+        for prefix, response in self._overrides.items():
+            if path.startswith(prefix):
+                return response
+        
+        if path == '/api/v3/klines':
+            return 200, 'binance_klines.json'
+        
+        if path.startswith('/v2/aggs/ticker/'):
+            # A segunda página é pedida pelo next_url, que carrega o cursor
+            return 200, 'polygon_aggs_page2.json' if 'cursor' in params else 'polygon_aggs_page1.json'
+        
+        if path.startswith('/v8/finance/chart/'):
+            return 200, 'yahoo_chart.json'
+        
+        if path == '/query':
+            if params.get('function') == 'TIME_SERIES_DAILY':
+                return 200, 'alphavantage_daily.json'
+            return 200, 'alphavantage_intraday.json'
+        
+        return 404, None
+    
+    def _handler(self):
+        """Classe de handler ligada a esta instância"""
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+            
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = dict(parse_qsl(url.query))
+                stub.requests.append((url.path, params))
+                status, fixture = stub.route(url.path, params)
+                
+                body = b'{}'
+                if fixture:
+                    text = (FIXTURES_DIR / fixture).read_text(encoding='utf-8')
+                    body = text.replace('{base_url}', stub.base_url).encode('utf-8')
+                
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        
+        return Handler
+    
+    def start(self) -> 'StubServer':
+        """Inicia o servidor em segundo plano"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def serve(self):
+        """Atende requisições no processo atual até Ctrl-C"""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            self._server.server_close()
+    
+    def stop(self):
+        """Encerra o servidor"""
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def fixture(self, name: str) -> Dict:
+        """Conteúdo de uma fixture (com next_url apontando para este servidor)"""
+        text = (FIXTURES_DIR / name).read_text(encoding='utf-8')
+        return json.loads(text.replace('{base_url}', self.base_url))
+
+
+if __name__ == "__main__":
+    server = StubServer(port=8765)
+    print(f"Servindo fixtures em {server.base_url} (Ctrl-C para sair)")
+    server.serve()
\ No newline at end of file
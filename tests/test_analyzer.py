@@ -0,0 +1,44 @@
+"""
+Testes da análise por símbolo
+"""
+
+import numpy as np
+import pytest
+
+from config.settings import Config
+from core.analyzer import Analyzer
+from core.market_buffer import MarketDataBuffer
+
+TIMESTAMPS = (np.arange(50, dtype=np.int64) + 1_700_000_000) * 10**9
+
+
+def make_buffer(**closes) -> MarketDataBuffer:
+    """Buffer com uma série de fechamentos por símbolo"""
+    buffer = MarketDataBuffer()
+    for symbol, close in closes.items():
+        buffer.append_arrays(symbol, {'timestamp': TIMESTAMPS, 'close': close})
+    return buffer
+
+
+def test_symbols_are_analyzed_separately():
+    up, down = np.linspace(100, 120, 50), np.linspace(50000, 40000, 50)
+    analyzer = Analyzer(Config())
+    metrics = {'UP': {'beta': 0.5}, 'DOWN': {'beta': 1.5}}
+    
+    results = analyzer.analyze_symbols('dados.csv', make_buffer(UP=up, DOWN=down), metrics)
+    
+    assert results['UP']['tendencia'] == 'alta'
+    assert results['DOWN']['tendencia'] == 'baixa'
+    assert results['UP']['beta'] == 0.5
+    assert results['DOWN']['beta'] == 1.5
+    
+    # Cada símbolo tem o mesmo resultado que teria sozinho
+    alone = analyzer.analyze('dados.csv', make_buffer(DOWN=down))
+    assert {k: v for k, v in results['DOWN'].items() if k != 'beta'} == alone
+
+
+def test_analyze_rejects_several_symbols():
+    buffer = make_buffer(A=np.ones(50), B=np.ones(50))
+    
+    with pytest.raises(ValueError, match='analyze_symbols'):
+        Analyzer(Config()).analyze('dados.csv', buffer)
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""
+Testes da coleta em blocos contra o stub das APIs
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from config.settings import Config
+from core.collection_run import CollectionRun
+from core.data_fetcher import DataFetcher
+
+T0 = datetime(2025, 11, 21, 14, 30, tzinfo=timezone.utc)
+
+
+def make_config(stub, tmp_path, provider: str) -> Config:
+    """Configuração de coleta em blocos de duas consultas"""
+    return Config(symbol='AAPL', period='10min', api_provider=provider, api_key='test-key',
+                  api_base_url=stub.base_url, api_min_interval=0, checkpoint_size=2,
+                  runs_dir=str(tmp_path), as_of=T0 + timedelta(minutes=10))
+
+
+def make_queries():
+    """Seis consultas, de 14:31:30 a 14:36:30"""
+    return [{'timestamp': T0 + timedelta(minutes=i, seconds=90), 'symbol': 'AAPL',
+             'period_idx': i // 2, 'query_idx': i % 2, 'percentage': 50.0 * (i % 2)}
+            for i in range(6)]
+
+
+def test_chunks_only_request_new_ranges(stub, tmp_path):
+    config = make_config(stub, tmp_path, 'polygon')
+    market_data = CollectionRun(config).run(make_queries())
+    
+    # Uma primeira página por bloco, cada uma começando onde a anterior parou
+    ranges = [tuple(int(part) for part in path.split('/')[-2:])
+              for path, params in stub.requests if 'cursor' not in params]
+    assert len(ranges) == 3
+    assert ranges[0][0] == int((make_queries()[0]['timestamp'] - timedelta(days=3)).timestamp() * 1000)
+    assert all(prev[1] == cur[0] for prev, cur in zip(ranges, ranges[1:]))
+    
+    expected = DataFetcher(config).fetch_all(make_queries())
+    assert market_data.to_frame().equals(expected.to_frame())
+
+
+def test_alphavantage_month_fetched_once(stub, tmp_path):
+    market_data = CollectionRun(make_config(stub, tmp_path, 'alphavantage')).run(make_queries())
+    
+    assert len(market_data) == 6
+    assert len(stub.requests) == 1
+
+
+def test_resolution_is_chosen_for_whole_run(stub, tmp_path):
+    # Consultas diárias de 21/11 a 27/11 em blocos de 4: o segundo bloco repete
+    # 25/11 (fim de um período, início do outro) e o último só tem 27/11
+    config = Config(symbol='AAPL', period='2dia', qtd_periodo=3, qtd_consultas=3,
+                    api_provider='alphavantage', api_key='test-key', api_base_url=stub.base_url,
+                    api_min_interval=0, checkpoint_size=4, runs_dir=str(tmp_path),
+                    timezone='UTC', as_of=datetime(2025, 11, 27, tzinfo=timezone.utc))
+    run = CollectionRun(config)
+    queries = run.queries()
+    assert [end - start for start, end in run.chunks(len(queries))] == [4, 4, 1]
+    
+    market_data = run.run(queries)
+    
+    assert {params['function'] for _, params in stub.requests} == {'TIME_SERIES_DAILY'}
+    assert market_data.to_frame().equals(DataFetcher(config).fetch_all(queries).to_frame())
+
+
+def test_outage_marks_chunks_failed(stub, tmp_path):
+    stub.override('/v2/aggs', status=500)
+    config = make_config(stub, tmp_path, 'polygon')
+    config.fallback_mock = True
+    run = CollectionRun(config)
+    
+    with pytest.raises(RuntimeError):
+        run.run(make_queries())
+    
+    manifest = json.loads((run.run_dir / 'manifest.json').read_text(encoding='utf-8'))
+    assert manifest['completed'] == {}
+    assert len(manifest['failed']) == 3
+    assert not list(run.run_dir.glob('chunk_*.npz'))
\ No newline at end of file
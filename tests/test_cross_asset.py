@@ -0,0 +1,93 @@
+"""
+Testes do alinhamento em blocos e das métricas entre ativos
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.cross_asset import cross_asset_analysis, iter_aligned_closes
+from core.market_buffer import MarketDataBuffer
+
+SYMBOLS = ['A', 'B', 'C', 'D']
+BARS = 600
+MINUTE_NS = 60 * 10**9
+
+
+@pytest.fixture
+def series():
+    """Fechamentos por símbolo com barras faltando (símbolo -> (ns, fechamento))"""
+    rng = np.random.default_rng(0)
+    market = np.cumsum(rng.normal(0, 1e-3, BARS))
+    data = {}
+    
+    for i, symbol in enumerate(SYMBOLS):
+        present = rng.random(BARS) > 0.1
+        close = 100 * np.exp(market * (0.5 + i / 2) + np.cumsum(rng.normal(0, 1e-3, BARS)))
+        data[symbol] = ((1_700_000_000 * 10**9 + np.arange(BARS) * MINUTE_NS)[present],
+                        close[present])
+    
+    return data
+
+
+def make_buffer(series, layout: str) -> MarketDataBuffer:
+    """Buffer símbolo a símbolo, intercalado por instante ou embaralhado"""
+    buffer = MarketDataBuffer()
+    
+    if layout == 'symbol':
+        for symbol, (ts, close) in series.items():
+            buffer.append_arrays(symbol, {'timestamp': ts, 'close': close})
+        return buffer
+    
+    rows = [(t, symbol, c) for symbol, (ts, close) in series.items() for t, c in zip(ts, close)]
+    if layout == 'time':
+        rows.sort(key=lambda row: row[0])
+    else:
+        np.random.default_rng(1).shuffle(rows)
+    
+    for t, symbol, c in rows:
+        buffer.append_arrays(symbol, {'timestamp': np.array([t]), 'close': np.array([c])})
+    
+    return buffer
+
+
+def expected_closes(series, symbols) -> pd.DataFrame:
+    """Grade de referência: união dos timestamps, NaN onde falta barra"""
+    frame = pd.DataFrame({symbol: pd.Series(series[symbol][1], index=series[symbol][0])
+                          for symbol in symbols})
+    frame.index = pd.DatetimeIndex(frame.index.values.view('datetime64[ns]')).tz_localize('UTC')
+    return frame
+
+
+@pytest.mark.parametrize('layout', ['symbol', 'time', 'shuffled'])
+@pytest.mark.parametrize('block_size', [1, 7, 1000])
+def test_blocks_match_dense_alignment(series, layout, block_size):
+    symbols = ['C', 'A']
+    blocks = list(iter_aligned_closes(make_buffer(series, layout), symbols, block_size))
+    
+    assert all(len(index) <= block_size for index, _ in blocks)
+    
+    index = blocks[0][0].append([index for index, _ in blocks[1:]])
+    closes = np.vstack([closes for _, closes in blocks])
+    expected = expected_closes(series, symbols)
+    
+    assert index.equals(expected.index)
+    assert np.array_equal(closes, expected.to_numpy(), equal_nan=True)
+
+
+def test_metrics_match_pandas_rolling(series):
+    window = 50
+    result = cross_asset_analysis(make_buffer(series, 'symbol'), 'A', window=window,
+                                  block_size=64)
+    
+    closes = expected_closes(series, SYMBOLS).ffill()
+    returns = np.log(closes / closes.shift())
+    bench = returns['A']
+    corr = returns.rolling(window).corr(bench).iloc[-1]
+    beta = returns.rolling(window).cov(bench, ddof=0).iloc[-1] / bench.iloc[-window:].var(ddof=0)
+    dispersion = returns.rolling(window).sum().iloc[-1].std(ddof=0)
+    
+    for symbol in SYMBOLS:
+        assert result[symbol]['correlacao'] == pytest.approx(corr[symbol], abs=1e-9)
+        assert result[symbol]['beta'] == pytest.approx(beta[symbol], abs=1e-9)
+        assert result[symbol]['dispersao'] == pytest.approx(dispersion, abs=1e-12)
\ No newline at end of file
@@ -0,0 +1,192 @@
+"""
+Testes dos adaptadores de intervalo contra respostas gravadas
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+
+from config.settings import Config
+from core.data_fetcher import DataFetcher, FetchError
+
+T0 = datetime(2025, 11, 21, 14, 30, tzinfo=timezone.utc)
+
+# "Agora" dentro da janela de 30 dias do Yahoo para barras de 1 minuto
+YAHOO_NOW = (T0 + timedelta(days=1)).timestamp()
+
+
+def make_fetcher(stub, provider: str, **kwargs) -> DataFetcher:
+    """Fetcher apontado para o stub, sem espera entre requisições"""
+    config = Config(symbol='AAPL', period='10min', api_provider=provider, api_key='test-key',
+                    api_base_url=stub.base_url, api_min_interval=0, **kwargs)
+    return DataFetcher(config)
+
+
+def make_queries(*timestamps: datetime):
+    """Consultas no formato do QueryScheduler"""
+    return [{'timestamp': ts, 'symbol': 'AAPL', 'period_idx': i // 2, 'query_idx': i % 2,
+             'percentage': 50.0 * (i % 2)} for i, ts in enumerate(timestamps)]
+
+
+def polygon_klines(stub):
+    """Barras das duas páginas da Polygon, por abertura em ms"""
+    rows = (stub.fixture('polygon_aggs_page1.json')['results']
+            + stub.fixture('polygon_aggs_page2.json')['results'])
+    return {row['t']: [row['t'], row['o'], row['h'], row['l'], row['c'], row['v']] for row in rows}
+
+
+def assert_rows(fetcher, buffer, queries, klines):
+    """Linhas do buffer devem ser exatamente as de _format_data"""
+    frame = buffer.to_frame()
+    frame['symbol'] = frame['symbol'].astype(str)
+    expected = pd.DataFrame([fetcher._format_data(query, kline)
+                             for query, kline in zip(queries, klines)])
+    
+    assert list(frame.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(frame, expected, check_dtype=False)
+
+
+def test_polygon_follows_next_url(stub):
+    fetcher = make_fetcher(stub, 'polygon')
+    queries = make_queries(T0 + timedelta(seconds=90), T0 + timedelta(minutes=4),
+                           T0 + timedelta(minutes=6))
+    klines = polygon_klines(stub)
+    
+    buffer = fetcher.fetch_all(queries)
+    
+    # Última barra fechada: 14:30 (página 1), 14:33 e 14:35 (página 2)
+    opened = [T0, T0 + timedelta(minutes=3), T0 + timedelta(minutes=5)]
+    assert_rows(fetcher, buffer, queries, [klines[int(ts.timestamp() * 1000)] for ts in opened])
+    
+    assert len(stub.requests) == 2
+    first, second = stub.requests
+    assert first[0].endswith('/range/1/minute/%d/%d' % (
+        (T0 + timedelta(seconds=90) - timedelta(days=3)).timestamp() * 1000,
+        (T0 + timedelta(minutes=6)).timestamp() * 1000))
+    assert 'cursor' in second[1]
+    assert second[1]['apiKey'] == 'test-key'
+
+
+def test_polygon_single_query_returns_kline(stub):
+    fetcher = make_fetcher(stub, 'polygon')
+    query = make_queries(T0 + timedelta(minutes=2))[0]
+    
+    kline = fetcher._fetch_polygon(query)
+    
+    assert kline == polygon_klines(stub)[int((T0 + timedelta(minutes=1)).timestamp() * 1000)]
+
+
+def test_binance_appends_kline(stub):
+    fetcher = make_fetcher(stub, 'binance')
+    queries = make_queries(T0, T0 + timedelta(minutes=1))
+    
+    buffer = fetcher.fetch_all(queries)
+    
+    kline = stub.fixture('binance_klines.json')[0]
+    assert_rows(fetcher, buffer, queries, [kline, kline])
+    assert stub.requests[0] == ('/api/v3/klines', {
+        'symbol': 'AAPL', 'interval': '1m', 'limit': '1',
+        'startTime': str(int(T0.timestamp() * 1000))})
+
+
+def test_binance_failure_raises_unless_mock(stub):
+    stub.override('/api/v3/klines', status=500)
+    
+    with pytest.raises(FetchError, match='Sem dados'):
+        make_fetcher(stub, 'binance').fetch_all(make_queries(T0))
+    
+    buffer = make_fetcher(stub, 'binance', fallback_mock=True).fetch_all(make_queries(T0))
+    assert len(buffer) == 1
+
+
+def test_yahoo_skips_minutes_without_trades(stub, monkeypatch):
+    monkeypatch.setattr('core.data_fetcher.time.time', lambda: YAHOO_NOW)
+    fetcher = make_fetcher(stub, 'yahoo')
+    queries = make_queries(T0 + timedelta(minutes=3, seconds=10), T0 + timedelta(minutes=6))
+    
+    buffer = fetcher.fetch_all(queries)
+    
+    result = stub.fixture('yahoo_chart.json')['chart']['result'][0]
+    quote = result['indicators']['quote'][0]
+    klines = [[ts * 1000] + [quote[name][i] for name in ('open', 'high', 'low', 'close', 'volume')]
+              for i, ts in enumerate(result['timestamp'])]
+    
+    # O minuto 14:32 não teve negócios: a consulta de 14:33:10 fica com 14:31
+    assert_rows(fetcher, buffer, queries, [klines[1], klines[5]])
+    assert stub.requests[0][1]['interval'] == '1m'
+
+
+def test_alphavantage_intraday_uses_meta_time_zone(stub):
+    fetcher = make_fetcher(stub, 'alphavantage')
+    queries = make_queries(T0 + timedelta(seconds=90), T0 + timedelta(minutes=6))
+    
+    buffer = fetcher.fetch_all(queries)
+    
+    # "09:30:00" em US/Eastern é 14:30 UTC
+    klines = polygon_klines(stub)
+    opened = [T0, T0 + timedelta(minutes=5)]
+    assert_rows(fetcher, buffer, queries, [klines[int(ts.timestamp() * 1000)] for ts in opened])
+    assert stub.requests[0][1]['function'] == 'TIME_SERIES_INTRADAY'
+    assert stub.requests[0][1]['month'] == '2025-11'
+
+
+def test_daily_resolution_uses_previous_completed_day(stub):
+    fetcher = make_fetcher(stub, 'alphavantage')
+    days = [datetime(2025, 11, day, 15, 0, tzinfo=timezone.utc) for day in (19, 20, 21)]
+    queries = make_queries(*days)
+    
+    buffer = fetcher.fetch_all(queries)
+    
+    series = stub.fixture('alphavantage_daily.json')['Time Series (Daily)']
+    klines = [[None] + [series[f"2025-11-{day}"][key] for key in
+                        ('1. open', '2. high', '3. low', '4. close', '5. volume')]
+              for day in (18, 19, 20)]
+    
+    # A barra do próprio dia ainda não fechou: nada de olhar o fechamento de 21/11
+    assert_rows(fetcher, buffer, queries, klines)
+    assert stub.requests[0][1]['function'] == 'TIME_SERIES_DAILY'
+
+
+def test_server_error_raises_instead_of_mock(stub):
+    stub.override('/v2/aggs', status=500)
+    fetcher = make_fetcher(stub, 'polygon', fallback_mock=True)
+    
+    with pytest.raises(FetchError) as error:
+        fetcher.fetch_all(make_queries(T0 + timedelta(minutes=2)))
+    
+    assert '500' in str(error.value)
+    assert 'test-key' not in str(error.value)
+
+
+def test_alphavantage_rate_limit_raises(stub):
+    stub.override('/query', 'alphavantage_rate_limit.json')
+    fetcher = make_fetcher(stub, 'alphavantage')
+    
+    with pytest.raises(FetchError, match='rate limit'):
+        fetcher.fetch_all(make_queries(T0 + timedelta(minutes=2)))
+
+
+def test_yahoo_error_payload_raises(stub, monkeypatch):
+    monkeypatch.setattr('core.data_fetcher.time.time', lambda: YAHOO_NOW)
+    stub.override('/v8/finance/chart', 'yahoo_chart_error.json')
+    fetcher = make_fetcher(stub, 'yahoo')
+    
+    with pytest.raises(FetchError, match='delisted'):
+        fetcher.fetch_all(make_queries(T0 + timedelta(minutes=2)))
+
+
+def test_yahoo_minute_history_limit(stub):
+    fetcher = make_fetcher(stub, 'yahoo')
+    
+    with pytest.raises(FetchError, match='30 dias'):
+        fetcher.fetch_all(make_queries(T0 + timedelta(minutes=2)))
+    
+    assert stub.requests == []
+
+
+def test_query_without_completed_bar_raises(stub):
+    fetcher = make_fetcher(stub, 'polygon', fallback_mock=True)
+    
+    with pytest.raises(FetchError, match='Sem dados'):
+        fetcher.fetch_all(make_queries(T0 + timedelta(seconds=30)))
\ No newline at end of file
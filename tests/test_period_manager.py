@@ -0,0 +1,147 @@
+"""
+Testes do cálculo de janelas de tempo
+"""
+
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from config.settings import Config
+from core.period_manager import PeriodManager
+
+NEW_YORK = ZoneInfo('America/New_York')
+SAO_PAULO = ZoneInfo('America/Sao_Paulo')
+
+
+def make_periods(period: str, qtd: int, as_of: datetime, **kwargs):
+    """Períodos gerados para uma referência fixa"""
+    config = Config(period=period, qtd_periodo=qtd, as_of=as_of, **kwargs)
+    return PeriodManager(config).generate_periods()
+
+
+def wall(periods, tz=None):
+    """Limites como horário de parede ingênuo (no fuso informado)"""
+    return [tuple(bound.astimezone(tz).replace(tzinfo=None) if tz else bound
+                  for bound in period) for period in periods]
+
+
+def durations(periods):
+    """Duração real de cada período (subtração em UTC, não no horário de parede)"""
+    return [end.astimezone(timezone.utc) - start.astimezone(timezone.utc) for start, end in periods]
+
+
+@pytest.mark.parametrize('period, as_of, first_start, last_end', [
+    # Sábado, 22/11/2025
+    ('5min', datetime(2025, 11, 22, 15, 37, 42), datetime(2025, 11, 22, 15, 20),
+     datetime(2025, 11, 22, 15, 35)),
+    ('2hora', datetime(2025, 11, 22, 15, 37), datetime(2025, 11, 22, 8),
+     datetime(2025, 11, 22, 14)),
+    ('1semana', datetime(2025, 11, 22, 15, 37), datetime(2025, 10, 27),
+     datetime(2025, 11, 17)),
+    ('3mes', datetime(2025, 11, 22, 15, 37), datetime(2025, 1, 1),
+     datetime(2025, 10, 1)),
+    ('1ano', datetime(2025, 11, 22, 15, 37), datetime(2022, 1, 1),
+     datetime(2025, 1, 1)),
+])
+def test_aligned_periods_end_on_last_boundary(period, as_of, first_start, last_end):
+    periods = make_periods(period, 3, as_of, align_periods=True)
+    
+    assert periods[0][0] == first_start
+    assert periods[-1][1] == last_end
+    assert all(end == start for (_, end), (start, _) in zip(periods, periods[1:]))
+
+
+def test_weeks_start_on_monday():
+    periods = make_periods('1semana', 4, datetime(2025, 11, 22, 15, 37), align_periods=True)
+    
+    assert {start.weekday() for start, _ in periods} == {0}
+
+
+def test_month_end_is_clamped():
+    periods = make_periods('1mes', 2, datetime(2025, 3, 31, 10, 0))
+    
+    assert periods == [(datetime(2025, 1, 31, 10), datetime(2025, 2, 28, 10)),
+                       (datetime(2025, 2, 28, 10), datetime(2025, 3, 31, 10))]
+
+
+def test_naive_as_of_uses_configured_timezone():
+    naive = make_periods('10min', 3, datetime(2025, 11, 22, 12, 0), timezone='America/Sao_Paulo')
+    aware = make_periods('10min', 3, datetime(2025, 11, 22, 15, 0, tzinfo=timezone.utc),
+                         timezone='America/Sao_Paulo')
+    
+    assert naive == aware
+    assert naive[-1][1].tzinfo is not None
+    assert naive[-1][1].utcoffset() == timedelta(hours=-3)
+
+
+def test_aware_as_of_without_timezone_is_local_wall_time():
+    as_of = datetime(2025, 11, 22, 15, 0, tzinfo=timezone.utc)
+    
+    periods = make_periods('10min', 3, as_of)
+    
+    assert periods[-1][1] == as_of.astimezone().replace(tzinfo=None)
+    assert periods[-1][1].tzinfo is None
+
+
+def test_spring_forward_keeps_sub_day_durations():
+    # 09/03/2025: 02:00 EST salta para 03:00 EDT
+    as_of = datetime(2025, 3, 9, 3, 10, tzinfo=NEW_YORK)
+    
+    periods = make_periods('10min', 3, as_of, timezone='America/New_York')
+    
+    assert wall(periods, NEW_YORK) == [
+        (datetime(2025, 3, 9, 1, 40), datetime(2025, 3, 9, 1, 50)),
+        (datetime(2025, 3, 9, 1, 50), datetime(2025, 3, 9, 3, 0)),
+        (datetime(2025, 3, 9, 3, 0), datetime(2025, 3, 9, 3, 10)),
+    ]
+    assert set(durations(periods)) == {timedelta(minutes=10)}
+
+
+def test_fall_back_covers_repeated_hour():
+    # 02/11/2025: 02:00 EDT volta para 01:00 EST; a hora 01:00-02:00 se repete
+    as_of = datetime(2025, 11, 2, 7, 0, tzinfo=timezone.utc)
+    
+    periods = make_periods('30min', 4, as_of, timezone='America/New_York', align_periods=True)
+    
+    starts = [start.astimezone(timezone.utc) for start, _ in periods]
+    assert starts == [datetime(2025, 11, 2, 5, 0, tzinfo=timezone.utc) + timedelta(minutes=30 * i)
+                      for i in range(4)]
+    assert [start.utcoffset() for start, _ in periods] == [timedelta(hours=-4)] * 2 + [timedelta(hours=-5)] * 2
+    assert set(durations(periods)) == {timedelta(minutes=30)}
+
+
+def test_sao_paulo_dst_start_skips_midnight():
+    # 04/11/2018: 00:00 -03 salta para 01:00 -02
+    as_of = datetime(2018, 11, 4, 2, 0, tzinfo=SAO_PAULO)
+    
+    periods = make_periods('1hora', 3, as_of, timezone='America/Sao_Paulo', align_periods=True)
+    
+    assert wall(periods, SAO_PAULO) == [
+        (datetime(2018, 11, 3, 22), datetime(2018, 11, 3, 23)),
+        (datetime(2018, 11, 3, 23), datetime(2018, 11, 4, 1)),
+        (datetime(2018, 11, 4, 1), datetime(2018, 11, 4, 2)),
+    ]
+    assert set(durations(periods)) == {timedelta(hours=1)}
+
+
+def test_sao_paulo_dst_end_day_has_25_hours():
+    # 17/02/2019: 00:00 -02 volta para 23:00 -03 do dia 16
+    as_of = datetime(2019, 2, 18, 12, 0, tzinfo=SAO_PAULO)
+    
+    periods = make_periods('1dia', 2, as_of, timezone='America/Sao_Paulo', align_periods=True)
+    
+    assert wall(periods, SAO_PAULO) == [(datetime(2019, 2, 16), datetime(2019, 2, 17)),
+                                        (datetime(2019, 2, 17), datetime(2019, 2, 18))]
+    assert durations(periods) == [timedelta(hours=25), timedelta(hours=24)]
+
+
+@pytest.mark.parametrize('period, qtd, tz', [
+    ('1dia', 1_000_000, None),
+    ('1mes', 10_000, None),
+    ('1ano', 1_000, 'America/New_York'),
+    ('10min', 10**12, 'UTC'),
+])
+def test_periods_beyond_datetime_range_raise(period, qtd, tz):
+    with pytest.raises(ValueError, match='limite de datas'):
+        make_periods(period, qtd, datetime(2025, 11, 22, 15, 0), timezone=tz)
\ No newline at end of file
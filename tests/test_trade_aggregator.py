@@ -0,0 +1,105 @@
+"""
+Testes da agregação de negócios em barras
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.trade_aggregator import TradeAggregator, read_agg_trades, simulated_trades
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+
+# Um único fluxo fixo, re-fatiado em cada teste (o feed simulado sorteia por bloco)
+TRADES = tuple(np.concatenate(arrays) for arrays in
+               zip(*simulated_trades(5_000, chunk_size=5_000, seed=7)))
+
+
+def rechunk(trades, size: int):
+    """Fatia (timestamp_ms, preço, quantidade) em blocos de `size` negócios"""
+    ts, price, qty = trades
+    return [(ts[i:i + size], price[i:i + size], qty[i:i + size]) for i in range(0, len(ts), size)]
+
+
+def aggregate(bar_type: str, bar_size: str, chunks) -> pd.DataFrame:
+    """Barras do fluxo como DataFrame"""
+    return TradeAggregator('BTCUSDT', bar_type, bar_size).aggregate(chunks).to_frame()
+
+
+@pytest.mark.parametrize('bar_type, bar_size', [
+    ('time', '1min'), ('time', '30seg'), ('tick', '100'), ('volume', '2.5'),
+])
+@pytest.mark.parametrize('chunk_size', [1, 13, 997, 200_000])
+def test_bars_do_not_depend_on_chunk_size(bar_type, bar_size, chunk_size):
+    whole = aggregate(bar_type, bar_size, [TRADES])
+    
+    bars = aggregate(bar_type, bar_size, rechunk(TRADES, chunk_size))
+    
+    pd.testing.assert_frame_equal(bars, whole)
+
+
+def test_time_bars_match_pandas_groupby():
+    ts, price, qty = TRADES
+    trades = pd.DataFrame({'price': price, 'qty': qty}, index=ts // 60_000 * 60_000)
+    expected = trades.groupby(level=0).agg(open=('price', 'first'), high=('price', 'max'),
+                                           low=('price', 'min'), close=('price', 'last'),
+                                           volume=('qty', 'sum'))
+    
+    bars = aggregate('time', '1min', rechunk(TRADES, 997))
+    
+    assert (bars['timestamp'].astype('int64') // 10**6).tolist() == expected.index.tolist()
+    for column in ('open', 'high', 'low', 'close', 'volume'):
+        np.testing.assert_allclose(bars[column], expected[column])
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 6])
+def test_volume_trade_crossing_several_multiples(chunk_size):
+    # O 3º negócio leva o volume de 0.8 a 3.3: cruza 1, 2 e 3 de uma vez
+    qty = np.array([0.4, 0.4, 2.5, 0.3, 0.5, 0.5])
+    trades = (np.arange(6, dtype=np.int64) * 1000, np.arange(100.0, 106.0), qty)
+    
+    bars = aggregate('volume', '1', rechunk(trades, chunk_size))
+    
+    # A barra seguinte fecha ao cruzar 4 (apenas 0.7 depois), não 4.3
+    np.testing.assert_allclose(bars['volume'], [3.3, 0.8, 0.5])
+    assert bars['open'].tolist() == [100.0, 103.0, 105.0]
+    assert bars['close'].tolist() == [102.0, 104.0, 105.0]
+    assert bars['period_idx'].tolist() == [0, 1, 2]
+
+
+@pytest.mark.parametrize('name', ['agg_trades.csv', 'agg_trades_header.csv', 'agg_trades_us.csv',
+                                  'agg_trades.jsonl', 'agg_trades.json'])
+def test_read_agg_trades_formats(name):
+    chunks = list(read_agg_trades(str(FIXTURES_DIR / name), chunk_size=4))
+    
+    assert [len(ts) for ts, _, _ in chunks] == [4, 2]
+    ts, price, qty = (np.concatenate(arrays) for arrays in zip(*chunks))
+    assert ts.tolist() == [1763735400123, 1763735412500, 1763735441999,
+                           1763735460000, 1763735475321, 1763735521004]
+    assert price.tolist() == [91250.10, 91251.00, 91249.55, 91260.00, 91258.20, 91262.75]
+    assert qty.tolist() == [0.012, 0.25, 0.003, 1.1, 0.04, 0.5]
+
+
+def test_agg_trades_file_to_minute_bars():
+    bars = aggregate('time', '1min', read_agg_trades(str(FIXTURES_DIR / 'agg_trades_us.csv'), 2))
+    
+    assert bars['timestamp'].dt.strftime('%H:%M').tolist() == ['14:30', '14:31', '14:32']
+    assert bars['open'].tolist() == [91250.10, 91260.00, 91262.75]
+    assert bars['high'].tolist() == [91251.00, 91260.00, 91262.75]
+    assert bars['close'].tolist() == [91249.55, 91258.20, 91262.75]
+    np.testing.assert_allclose(bars['volume'], [0.265, 1.14, 0.5])
+
+
+@pytest.mark.parametrize('bar_size', ['1mes', '3meses', '1ano'])
+def test_time_bars_reject_calendar_units(bar_size):
+    with pytest.raises(ValueError, match='mês/ano'):
+        TradeAggregator('BTCUSDT', 'time', bar_size)
+
+
+def test_out_of_order_trades_raise():
+    aggregator = TradeAggregator('BTCUSDT', 'tick', '10')
+    
+    with pytest.raises(ValueError, match='ordem'):
+        aggregator.update(np.array([2, 1]), np.array([1.0, 1.0]), np.array([1.0, 1.0]))
\ No newline at end of file